@@ -2,11 +2,13 @@ import pandas as pd
 import streamlit as st
 import re
 import preprocess
+import cache
 import datetime
 import helper
-import seaborn as sns
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
+import charts
+import profiling
+import search
+from collections import OrderedDict
 
 # Page configuration
 st.set_page_config(
@@ -234,14 +236,113 @@ st.markdown("""
 # Main header
 st.markdown("## 💬 WhatsApp Chat Analyzer")
 
+# Analysis results kept per session, so going back to an earlier selection is
+# instant and changing the user or dates only recomputes what depends on them
+ANALYSIS_CACHE_SIZE = 64
+
+# Result of compute() memoized in this session under key (file hash, aggregate
+# name and the selection it depends on), least recently used entries dropped
+def memoized(key, compute):
+    results = st.session_state.setdefault('analysis', OrderedDict())
+    if key in results:
+        results.move_to_end(key)
+        return results[key]
+    results[key] = compute()
+    while len(results) > ANALYSIS_CACHE_SIZE:
+        results.popitem(last=False)
+    return results[key]
+
+# Paginated chat viewer: only the current page of rows is sent to the browser.
+# Runs as a fragment, so paging, searching and jumping rerun this block alone.
+@st.fragment
+def chat_viewer(chat, rows, row_index, word_index, start_date, end_date, user):
+    search_col, size_col, jump_col = st.columns([3, 1, 2])
+    # Searching or changing the page size starts again from the first page
+    query = search_col.text_input("Search messages", key='viewer_query',
+                                  help='Words match as prefixes; quote a word for an exact match, '
+                                       'or several for an exact phrase',
+                                  on_change=lambda: st.session_state.update(viewer_page=1))
+    page_size = size_col.selectbox("Rows per page", [25, 50, 100, 500], index=1, key='viewer_page_size',
+                                   on_change=lambda: st.session_state.update(viewer_page=1))
+    # Inverted index hits for this user and date range, as positions into rows
+    matches = search.match_rows(word_index, chat, rows, query, row_index, start_date, end_date, user)
+    pages = max(1, -(-len(matches) // page_size))
+
+    # Jumping to a date turns to the page holding its first (matching) message
+    def jump():
+        day = st.session_state['viewer_jump']
+        if day is not None:
+            first = search.first_row_on_or_after(rows, row_index, matches, day)
+            st.session_state['viewer_page'] = min(first // page_size + 1, pages)
+    jump_col.date_input("Jump to date", value=None, min_value=start_date, max_value=end_date,
+                        key='viewer_jump', on_change=jump)
+
+    if st.session_state.get('viewer_page', 1) > pages:
+        st.session_state['viewer_page'] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key='viewer_page')
+
+    first = (page - 1) * page_size
+    st.caption(f"Rows {min(first + 1, len(matches))}–{min(first + page_size, len(matches))} "
+               f"of {len(matches)}{' matching' if query else ''}")
+    st.dataframe(search.view_page(rows, matches, page, page_size))
+
+# A recorded run that was interrupted (a widget changed mid-run) or raised never
+# reached profiling.stop(); runs reuse the session's thread, so stop any recorder
+# left behind before this run decides whether to record
+profiling.stop()
+
 # Sidebar: File Uploader
 uploaded_file = st.sidebar.file_uploader("Choose your file", type='txt')
 
 # If file is uploaded
 if uploaded_file is not None:
-    # Convert uploaded file into DataFrame
-    df = preprocess.create_dataframe_from_file(uploaded_file)
-    
+    # Record wall time and peak memory of every stage of this run
+    record_performance = st.sidebar.checkbox("Record performance", value=False)
+    if record_performance:
+        profiling.start(cprofile=st.sidebar.checkbox("Include cProfile dump", value=False))
+        # Calls made through these names during this run are recorded as stages
+        cache, helper, charts, search = (profiling.instrumented(module) for module in (cache, helper, charts, search))
+
+    # Reuse the parsed frame from disk when this exact file was seen before
+    use_cache = st.sidebar.checkbox("Cache parsed chat", value=cache.CACHE_ENABLED)
+
+    # Categorical and small-integer columns for large group exports
+    compact = st.sidebar.checkbox("Compact dtypes", value=False)
+
+    # Content hash identifies this upload across reruns
+    digest = cache.file_digest(uploaded_file)
+
+    # Parse large exports in shards across all cores
+    parallel_parse = st.sidebar.checkbox("Parse in parallel", value=False)
+
+    # Draw charts in a process pool on multi-core hosts
+    parallel_charts = st.sidebar.checkbox("Render charts in parallel", value=False)
+
+    # Convert uploaded file into DataFrame once per uploaded file, then aggregate
+    # it into the (user x date x hour) cube (cached next to the frame, and
+    # updated rather than rebuilt for extended exports), index rows by day and
+    # user, and build the full-text word index (cached next to the frame too).
+    # Widget changes rerun the script but reuse all of these from the session.
+    ingest_key = (digest, compact)
+    if st.session_state.get('ingest_key') != ingest_key:
+        df = cache.load_dataframe(uploaded_file, enabled=use_cache, compact=compact, digest=digest,
+                                  workers=preprocess.PARSE_WORKERS if parallel_parse else 1)
+        st.session_state['df'] = df
+        # Deep memory usage walks every string, so measure it once per file
+        st.session_state['df_bytes'] = df.memory_usage(deep=True).sum()
+        st.session_state['cube'] = cache.load_cube(digest, df, compact=compact) if use_cache else helper.build_cube(df)
+        st.session_state['row_index'] = helper.build_row_index(df)
+        st.session_state['word_index'] = (cache.load_search_index(digest, df, compact=compact) if use_cache
+                                          else search.build_index(df['messages']))
+        st.session_state['ingest_key'] = ingest_key
+        # Results for the previous file are no longer reachable
+        st.session_state['analysis'] = OrderedDict()
+    df = st.session_state['df']
+    st.sidebar.caption(f"In-memory size: {st.session_state['df_bytes'] / 1024**2:.1f} MB")
+    cube = st.session_state['cube']
+    row_index = st.session_state['row_index']
+    word_index = st.session_state['word_index']
+
     # Initialize options list for user selection
     options = ['all']
     
@@ -253,9 +354,9 @@ if uploaded_file is not None:
     choice = st.sidebar.selectbox("Choose a user:", options)
     st.sidebar.write(f"You selected {choice}.")
     
-    # Get min/max dates for date range filter
-    min_date = df.loc[0,'date']
-    max_date = df.iloc[-1]['date']
+    # Get min/max dates for date range filter (compact frames hold timestamps)
+    min_date = pd.Timestamp(df.loc[0,'date']).date()
+    max_date = pd.Timestamp(df.iloc[-1]['date']).date()
     
     # Default date range (entire chat)
     default_start_date = min_date
@@ -275,15 +376,36 @@ if uploaded_file is not None:
     
     # Display selected date range
     st.sidebar.write(f"{start_date.strftime('%Y-%m-%d')} - {end_date.strftime('%Y-%m-%d')}")
+
+    # A conversation starts with the first message of the day, or after an idle gap
+    starter_gap = st.sidebar.number_input("Conversation gap in minutes (0 = first message of the day)",
+                                          min_value=0, value=0, step=30)
     
-    # Analysis button clicked
+    # Once shown, the analysis stays on screen for this file: later widget
+    # changes redraw it for the new selection instead of clearing it
     if st.sidebar.button("Show Analysis"):
-        # Filter DataFrame by date range
-        df = helper.date_range_dataframe(df, start_date, end_date)
-        
-        # Filter by specific user if selected
-        if(choice != 'all'):
-            df = df[df['user'] == choice].reset_index(drop=True)
+        st.session_state['show_analysis'] = ingest_key
+    if st.session_state.get('show_analysis') == ingest_key:
+        # Filter DataFrame by date range and selected user through the row index
+        # (two binary searches, so these are not memoized), keeping the whole
+        # chat for whole-word searches
+        chat = df
+        range_df = helper.filter_rows(df, row_index, start_date, end_date)
+        df = range_df if choice == 'all' else helper.filter_rows(df, row_index, start_date, end_date, choice)
+
+        # Aggregates below are memoized by the file and the selection they depend on
+        selection = (digest, choice, start_date, end_date)
+
+        # Matching slice of the cube for timelines and user counts
+        cube = memoized(('cube',) + selection, lambda: helper.slice_cube(cube, start_date, end_date, choice))
+
+        # Rendered charts are reused for the same file, user and date range
+        chart_key = (digest, choice, start_date, end_date)
+
+        # Charts are drawn here or, when enabled, in worker processes and
+        # written into their placeholders as they finish
+        chart_workers = charts.CHART_WORKERS if parallel_charts else None
+        pending_charts = []
         
         # ===== DATA OVERVIEW SECTION =====
         st.markdown("""
@@ -292,12 +414,13 @@ if uploaded_file is not None:
         </div>
         """, unsafe_allow_html=True)
         
-        # Display filtered data
+        # Display filtered data a page at a time
         with st.expander("View Chat Data", expanded=False):
-            st.dataframe(df)
+            chat_viewer(chat, df, row_index, word_index, start_date, end_date, choice)
         
         # Calculate and display basic stats
-        total_messages, total_media, total_words, total_links = helper.basic_stats(df)
+        total_messages, total_media, total_words, total_links = memoized(('basic_stats',) + selection,
+                                                                         lambda: helper.basic_stats(cube))
         
         # Stats in columns with custom styling
         col1, col2, col3, col4 = st.columns(4)
@@ -348,29 +471,12 @@ if uploaded_file is not None:
         </div>
         """, unsafe_allow_html=True)
         
-        timeline = helper.monthly_timeline(df)
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.lineplot(x=timeline['time'], y=timeline['messages'], ax=ax, color='#00d4ff', linewidth=3, marker='o', markersize=6)
-        
-        ax.set_title("Messages Per Month", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
-        ax.set_ylabel("No. Of Messages", color='#cccccc', fontsize=12)
-        ax.set_xlabel("", color='#cccccc')
-        ax.set_facecolor('#1a1a1a')
-        fig.patch.set_facecolor('#1a1a1a')
-        ax.tick_params(colors='#cccccc')
-        ax.spines['bottom'].set_color('#404040')
-        ax.spines['top'].set_color('#404040')
-        ax.spines['left'].set_color('#404040')
-        ax.spines['right'].set_color('#404040')
-        
-        # Limit x-axis ticks for readability
-        ax.xaxis.set_major_locator(ticker.MaxNLocator(nbins=10))
-        plt.xticks(rotation=45, ha='right')
+        future = charts.submit(chart_key, 'monthly', lambda: helper.monthly_timeline(cube), chart_workers)
         
         st.markdown("""
         <div class="chart-container">
         """, unsafe_allow_html=True)
-        st.pyplot(fig)
+        charts.place(st.empty(), future, pending_charts)
         st.markdown("</div>", unsafe_allow_html=True)
 
         # Daily Timeline Chart
@@ -380,27 +486,12 @@ if uploaded_file is not None:
         </div>
         """, unsafe_allow_html=True)
         
-        timeline = helper.datewise_timeline(df)
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.lineplot(x=timeline['date'], y=timeline['messages'], color='#ff6b6b', linewidth=2, alpha=0.8)
-        
-        ax.set_title("Messages Per Day", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
-        ax.set_ylabel("No. Of Messages", color='#cccccc', fontsize=12)
-        ax.set_xlabel("", color='#cccccc')
-        ax.set_facecolor('#1a1a1a')
-        fig.patch.set_facecolor('#1a1a1a')
-        ax.tick_params(colors='#cccccc')
-        ax.spines['bottom'].set_color('#404040')
-        ax.spines['top'].set_color('#404040')
-        ax.spines['left'].set_color('#404040')
-        ax.spines['right'].set_color('#404040')
-        
-        plt.xticks(rotation='vertical')
+        future = charts.submit(chart_key, 'daily', lambda: helper.datewise_timeline(cube), chart_workers)
         
         st.markdown("""
         <div class="chart-container">
         """, unsafe_allow_html=True)
-        st.pyplot(fig)
+        charts.place(st.empty(), future, pending_charts)
         st.markdown("</div>", unsafe_allow_html=True)
 
         # ===== TIME PATTERNS SECTION =====
@@ -417,28 +508,12 @@ if uploaded_file is not None:
         </div>
         """, unsafe_allow_html=True)
         
-        timeline = helper.hourly_timeline(df)
-        fig, ax = plt.subplots(figsize=(10, 6))
-        colors = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#ff9ff3', '#54a0ff', '#5f27cd', '#00d2d3', '#ff9f43', '#10ac84', '#ee5a24', '#2e86de', '#a55eea', '#26de81', '#778ca3', '#fd79a8', '#fdcb6e', '#6c5ce7', '#00b894', '#e84393', '#6c5ce7', '#00cec9', '#fd79a8']
-        sns.barplot(x=timeline['period'], y=timeline['messages'], ax=ax, palette=colors[:len(timeline)])
-        
-        ax.set_title("Messages Per Hour", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
-        ax.set_ylabel("No. Of Messages", color='#cccccc', fontsize=12)
-        ax.set_xlabel("", color='#cccccc')
-        ax.set_facecolor('#1a1a1a')
-        fig.patch.set_facecolor('#1a1a1a')
-        ax.tick_params(colors='#cccccc')
-        ax.spines['bottom'].set_color('#404040')
-        ax.spines['top'].set_color('#404040')
-        ax.spines['left'].set_color('#404040')
-        ax.spines['right'].set_color('#404040')
-        
-        plt.xticks(rotation='vertical')
+        future = charts.submit(chart_key, 'hourly', lambda: helper.hourly_timeline(cube), chart_workers)
         
         st.markdown("""
         <div class="chart-container">
         """, unsafe_allow_html=True)
-        st.pyplot(fig)
+        charts.place(st.empty(), future, pending_charts)
         st.markdown("</div>", unsafe_allow_html=True)
 
         # Weekly Timeline Chart
@@ -448,28 +523,12 @@ if uploaded_file is not None:
         </div>
         """, unsafe_allow_html=True)
         
-        timeline = helper.weekly_timeline(df)
-        fig, ax = plt.subplots(figsize=(10, 6))
-        weekly_colors = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#ff9ff3', '#54a0ff']
-        sns.barplot(x=timeline['day_name'], y=timeline['messages'], ax=ax, palette=weekly_colors)
-        
-        ax.set_title("Messages Per Day", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
-        ax.set_ylabel("No. Of Messages", color='#cccccc', fontsize=12)
-        ax.set_xlabel("", color='#cccccc')
-        ax.set_facecolor('#1a1a1a')
-        fig.patch.set_facecolor('#1a1a1a')
-        ax.tick_params(colors='#cccccc')
-        ax.spines['bottom'].set_color('#404040')
-        ax.spines['top'].set_color('#404040')
-        ax.spines['left'].set_color('#404040')
-        ax.spines['right'].set_color('#404040')
-        
-        plt.xticks(rotation='vertical')
+        future = charts.submit(chart_key, 'weekly', lambda: helper.weekly_timeline(cube), chart_workers)
         
         st.markdown("""
         <div class="chart-container">
         """, unsafe_allow_html=True)
-        st.pyplot(fig)
+        charts.place(st.empty(), future, pending_charts)
         st.markdown("</div>", unsafe_allow_html=True)
 
         # Monthly Timeline Chart
@@ -479,28 +538,12 @@ if uploaded_file is not None:
         </div>
         """, unsafe_allow_html=True)
         
-        timeline = helper.monthwise_timeline(df)
-        fig, ax = plt.subplots(figsize=(10, 6))
-        monthly_colors = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#ff9ff3', '#54a0ff', '#5f27cd', '#00d2d3', '#ff9f43', '#10ac84', '#ee5a24']
-        sns.barplot(x=timeline['month'], y=timeline['messages'], ax=ax, palette=monthly_colors[:len(timeline)])
-        
-        ax.set_title("Messages Per Month", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
-        ax.set_ylabel("No. Of Messages", color='#cccccc', fontsize=12)
-        ax.set_xlabel("", color='#cccccc')
-        ax.set_facecolor('#1a1a1a')
-        fig.patch.set_facecolor('#1a1a1a')
-        ax.tick_params(colors='#cccccc')
-        ax.spines['bottom'].set_color('#404040')
-        ax.spines['top'].set_color('#404040')
-        ax.spines['left'].set_color('#404040')
-        ax.spines['right'].set_color('#404040')
-        
-        plt.xticks(rotation='vertical')
+        future = charts.submit(chart_key, 'monthwise', lambda: helper.monthwise_timeline(cube), chart_workers)
         
         st.markdown("""
         <div class="chart-container">
         """, unsafe_allow_html=True)
-        st.pyplot(fig)
+        charts.place(st.empty(), future, pending_charts)
         st.markdown("</div>", unsafe_allow_html=True)
 
         # Weekly Heatmap
@@ -510,21 +553,12 @@ if uploaded_file is not None:
         </div>
         """, unsafe_allow_html=True)
         
-        table = helper.weekly_heatmap(df)
-        fig, ax = plt.subplots(figsize=(12, 6))
-        sns.heatmap(table, cmap='viridis', ax=ax, cbar_kws={'label': 'Messages'}, annot=True, fmt='.0f', linewidths=0.5)
-        
-        ax.set_title("Day-Time Heatmap", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
-        ax.set_ylabel("Day", color='#cccccc', fontsize=12)
-        ax.set_xlabel("Hour Of The Day", color='#cccccc', fontsize=12)
-        ax.set_facecolor('#1a1a1a')
-        fig.patch.set_facecolor('#1a1a1a')
-        ax.tick_params(colors='#cccccc')
+        future = charts.submit(chart_key, 'heatmap', lambda: helper.weekly_heatmap(cube), chart_workers)
         
         st.markdown("""
         <div class="chart-container">
         """, unsafe_allow_html=True)
-        st.pyplot(fig)
+        charts.place(st.empty(), future, pending_charts)
         st.markdown("</div>", unsafe_allow_html=True)
 
         # ===== CONTENT ANALYSIS SECTION =====
@@ -541,16 +575,13 @@ if uploaded_file is not None:
         </div>
         """, unsafe_allow_html=True)
         
-        df_wc = helper.create_wordcloud(df)
-        fig, ax = plt.subplots(figsize=(12, 8))
-        ax.imshow(df_wc)
-        ax.axis('off')
-        ax.set_title("Most Common Words in Chat", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
+        future = charts.submit(chart_key, 'wordcloud', lambda: helper.user_cloud_frequencies(
+            helper.word_tables((digest, start_date, end_date), range_df), choice), chart_workers)
         
         st.markdown("""
         <div class="chart-container">
         """, unsafe_allow_html=True)
-        st.pyplot(fig)
+        charts.place(st.empty(), future, pending_charts)
         st.markdown("</div>", unsafe_allow_html=True)
 
         # Emoji analysis
@@ -560,7 +591,7 @@ if uploaded_file is not None:
         </div>
         """, unsafe_allow_html=True)
         
-        emoji_frame = helper.most_common_emojis_dataframe(df)
+        emoji_frame = memoized(('emoji',) + selection, lambda: helper.most_common_emojis_dataframe(df))
         
         col1, col2 = st.columns(2)
         with col1:
@@ -572,34 +603,12 @@ if uploaded_file is not None:
         
         with col2:
             # Emoji pie chart
-            fig, ax = plt.subplots(figsize=(8, 8))
-            colors = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#ff9ff3', '#54a0ff', '#5f27cd', '#00d2d3', '#ff9f43']
-            wedges, texts, autotexts = ax.pie(
-                emoji_frame['count'].head(10),
-                labels=emoji_frame['emoji'].head(10),
-                autopct="%0.1f%%",
-                colors=colors[:len(emoji_frame.head(10))],
-                startangle=90
-            )
-            
-            # Style the pie chart
-            ax.set_title("Top 10 Emojis", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
-            ax.set_facecolor('#1a1a1a')
-            fig.patch.set_facecolor('#1a1a1a')
-            
-            # Style the text elements
-            for autotext in autotexts:
-                autotext.set_color('#ffffff')
-                autotext.set_fontweight('bold')
-            
-            for text in texts:
-                text.set_color('#cccccc')
-                text.set_fontsize(12)
+            future = charts.submit(chart_key, 'emoji', lambda: emoji_frame, chart_workers)
             
             st.markdown("""
             <div class="chart-container">
             """, unsafe_allow_html=True)
-            st.pyplot(fig)
+            charts.place(st.empty(), future, pending_charts)
             st.markdown("</div>", unsafe_allow_html=True)
 
         # ===== USER ANALYSIS SECTION =====
@@ -630,32 +639,12 @@ if uploaded_file is not None:
                 <div class="content-subtitle">📊 Most Active Users</div>
             </div>
             """, unsafe_allow_html=True)
-            timeline = helper.busy_user_bar(df).head(10)
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-            # Use better colors for the bar plot
-            colors = ['#00d4ff', '#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#ff9ff3', '#54a0ff', '#5f27cd', '#00d2d3']
-            sns.barplot(x=timeline['user'], y=timeline['messages'], palette=colors[:len(timeline)])
-            
-            # Style the chart
-            ax.set_title("Most Busy Users", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
-            ax.set_ylabel("Messages", color='#ffffff', fontsize=12)
-            ax.set_xlabel("Users", color='#ffffff', fontsize=12)
-            ax.set_facecolor('#1a1a1a')
-            fig.patch.set_facecolor('#1a1a1a')
-            ax.tick_params(colors='#cccccc')
-            
-            # Style the spines
-            for spine in ax.spines.values():
-                spine.set_color('#404040')
-            
-            plt.xticks(rotation=45, ha='right')
-            plt.tight_layout()
+            future = charts.submit(chart_key, 'busy_users', lambda: helper.busy_user_bar(cube).head(10), chart_workers)
             
             st.markdown("""
             <div class="chart-container">
             """, unsafe_allow_html=True)
-            st.pyplot(fig)
+            charts.place(st.empty(), future, pending_charts)
             st.markdown("</div>", unsafe_allow_html=True)
 
             # User message percentages
@@ -664,7 +653,7 @@ if uploaded_file is not None:
                 <div class="content-subtitle">📈 User Message Distribution</div>
             </div>
             """, unsafe_allow_html=True)
-            percent_df = helper.busy_user_dataframe(df)
+            percent_df = memoized(('busy_users',) + selection, lambda: helper.busy_user_dataframe(cube))
             
             st.markdown("""
             <div class="dataframe-container">
@@ -679,12 +668,16 @@ if uploaded_file is not None:
             </div>
             """, unsafe_allow_html=True)
             
+            # Every award winner from one aggregation of the per-user metrics
+            awards = memoized(('awards', starter_gap) + selection,
+                              lambda: helper.awards(cube, rows=df, gap=starter_gap or None))
+
             # Create columns for awards
             col1, col2 = st.columns(2)
             
             with col1:
                 # Chatterbox award
-                frame = helper.chatterbox(df)
+                frame = awards['chatterbox']
                 if frame is not None:
                     st.markdown(f"""
                     <div class="award-container">
@@ -698,7 +691,7 @@ if uploaded_file is not None:
                     st.text("No messages found.")
 
                 # Keyboard warrior award
-                frame = helper.keyboard_warrior(df)
+                frame = awards['keyboard_warrior']
                 if frame is not None:
                     st.markdown(f"""
                     <div class="award-container">
@@ -712,7 +705,7 @@ if uploaded_file is not None:
                     st.text("No messages found.")
 
                 # Media sharer award
-                frame = helper.media_Paglu(df)
+                frame = awards['media_sharer']
                 if frame is not None:
                     st.markdown(f"""
                     <div class="award-container">
@@ -726,7 +719,7 @@ if uploaded_file is not None:
                     st.text("No messages found.")
 
                 # Link master award
-                frame = helper.linkMaster(df)
+                frame = awards['link_master']
                 if frame is not None:
                     st.markdown(f"""
                     <div class="award-container">
@@ -741,7 +734,7 @@ if uploaded_file is not None:
 
             with col2:
                 # Early bird award
-                frame = helper.early_bird(df)
+                frame = awards['early_bird']
                 if frame is not None:
                     st.markdown(f"""
                     <div class="award-container">
@@ -755,7 +748,7 @@ if uploaded_file is not None:
                     st.text("No messages found.")
 
                 # Night owl award
-                frame = helper.nightowl(df)
+                frame = awards['night_owl']
                 if frame is not None:
                     st.markdown(f"""
                     <div class="award-container">
@@ -769,7 +762,7 @@ if uploaded_file is not None:
                     st.text("No messages found.")
 
                 # Dry replier award
-                frame = helper.dryReplier(df)
+                frame = awards['dry_replier']
                 if frame is not None:
                     st.markdown(f"""
                     <div class="award-container">
@@ -783,7 +776,7 @@ if uploaded_file is not None:
                     st.text("No messages found.")
 
                 # Essay writer award
-                frame = helper.eassyWriter(df)
+                frame = awards['essay_writer']
                 if frame is not None:
                     st.markdown(f"""
                     <div class="award-container">
@@ -801,7 +794,7 @@ if uploaded_file is not None:
             
             with col1:
                 # Ghost award
-                frame = helper.ghost(df)
+                frame = awards['ghost']
                 if frame is not None:
                     st.markdown(f"""
                     <div class="award-container">
@@ -816,19 +809,37 @@ if uploaded_file is not None:
 
             with col2:
                 # Conversation starter award
-                frame = helper.conversationStarter(df)
+                frame = awards['conversation_starter']
                 if frame is not None:
                     st.markdown(f"""
                     <div class="award-container">
                         <div class="award-title">🏆 Conversation Starter</div>
                         <div class="award-value">{str(frame['user'])}</div>
                         <div class="award-data">🚀 {int(frame['count'])} times</div>
-                        <div class="award-description">User who started most conversations (first message of the day)</div>
+                        <div class="award-description">User who started most conversations ({'first message of the day' if not starter_gap else f'first message after {starter_gap} quiet minutes'})</div>
                     </div>
                     """, unsafe_allow_html=True)
                 else:
                     st.text("No messages found.")
 
+        # Fill in charts still being drawn by workers
+        charts.fill(pending_charts)
+
+    # Stage timings for this run
+    if record_performance:
+        recorder = profiling.stop()
+        with st.expander("⏱️ Performance", expanded=False):
+            st.caption(f"Run took {recorder['seconds']:.2f}s (peak memory is above what was allocated when each stage began)")
+            stages = pd.DataFrame(profiling.report(recorder), columns=['stage', 'depth', 'calls', 'seconds', 'peak_mb'])
+            stages['stage'] = ['· ' * depth + name for name, depth in zip(stages['stage'], stages['depth'])]
+            st.dataframe(stages.drop(columns='depth'), hide_index=True)
+            st.download_button("Download JSON", profiling.to_json(recorder), file_name="performance.json",
+                               mime="application/json")
+            dump = profiling.profile_bytes(recorder)
+            if dump is not None:
+                st.download_button("Download cProfile dump", dump, file_name="performance.prof",
+                                   mime="application/octet-stream")
+
 # Welcome screen when no file uploaded
 elif uploaded_file is None:
     st.markdown("""
@@ -0,0 +1,22 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import preprocess
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of the parsed frame before and after the compact schema")
+    parser.add_argument('export', help="WhatsApp .txt export")
+    args = parser.parse_args()
+
+    with open(args.export, 'rb') as export:
+        df = preprocess.create_dataframe_from_file(export)
+
+    report = preprocess.memory_report(df)
+    print(f"messages: {len(df)}")
+    print((report[['before', 'after']] / 1024**2).round(2).join(report['saved']).to_string())
+    print("(before/after in MB)")
+
+if __name__ == '__main__':
+    main()
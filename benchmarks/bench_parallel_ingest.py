@@ -0,0 +1,51 @@
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pools
+import preprocess
+import synthetic
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-core vs sharded parallel ingest")
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    parser.add_argument('--export', help="WhatsApp .txt export to use instead of a synthetic one")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        help="worker counts to time (default: powers of two up to the core count)")
+    args = parser.parse_args()
+
+    if args.export:
+        with open(args.export, 'rb') as export:
+            data = export.read()
+    else:
+        data = synthetic.synthetic_export(args.messages)
+
+    workers = args.workers or [2 ** i for i in range(os.cpu_count().bit_length()) if 2 ** i <= os.cpu_count()]
+
+    start = time.perf_counter()
+    expected = preprocess.create_dataframe_from_file(io.BytesIO(data))
+    serial_time = time.perf_counter() - start
+
+    print(f"messages:        {len(expected)}")
+    print(f"single core:     {serial_time:.2f}s")
+
+    for count in workers:
+        if count < 2:
+            continue
+        # Start the workers outside the timed run
+        pools.submit(count, preprocess.parse_shard, "").result()
+
+        start = time.perf_counter()
+        df = preprocess.create_dataframe_from_file(io.BytesIO(data), workers=count)
+        parallel_time = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(expected, df)
+        print(f"{count:>2} workers:      {parallel_time:.2f}s  ({serial_time / parallel_time:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What a cold start of the app imports now, and what it paid when plotting,
+# word cloud, emoji and URL extraction were loaded (and URLExtract built) at import
+SCENARIOS = {
+    'streamlit only': "import streamlit",
+    'app modules (lazy)': "import streamlit, preprocess, cache, helper, charts",
+    'app modules (eager)': "import streamlit, preprocess, cache, helper, charts; "
+                           "import matplotlib.pyplot, matplotlib.ticker, seaborn, wordcloud, emoji; "
+                           "preprocess.url_extractor()",
+}
+
+# Wall time of a fresh interpreter running one import statement
+def cold_start(code):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time of the app's modules")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    # Warm the filesystem cache so every scenario reads from memory
+    cold_start(SCENARIOS['app modules (eager)'])
+
+    for name, code in SCENARIOS.items():
+        times = [cold_start(code) for _ in range(args.runs)]
+        print(f"{name:<22} {statistics.median(times):.2f}s  (median of {args.runs})")
+
+if __name__ == '__main__':
+    main()
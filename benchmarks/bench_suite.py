@@ -0,0 +1,216 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import helper
+import preprocess
+import synthetic
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, 'data')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Helper calls timed after parsing, with the inputs the app passes them:
+# timelines, leaderboards and awards take the cube, text analyses the frame
+HELPER_STAGES = {
+    'helper.build_cube': lambda c: helper.build_cube(c['df']),
+    'helper.build_row_index': lambda c: helper.build_row_index(c['df']),
+    'helper.date_range_dataframe': lambda c: helper.date_range_dataframe(c['df'], c['start'], c['end']),
+    'helper.filter_rows': lambda c: helper.filter_rows(c['df'], c['index'], c['start'], c['end']),
+    'helper.filter_rows[user]': lambda c: helper.filter_rows(c['df'], c['index'], c['start'], c['end'], c['user']),
+    'helper.slice_cube': lambda c: helper.slice_cube(c['cube'], c['start'], c['end']),
+    'helper.basic_stats': lambda c: helper.basic_stats(c['cube']),
+    'helper.monthly_timeline': lambda c: helper.monthly_timeline(c['cube']),
+    'helper.datewise_timeline': lambda c: helper.datewise_timeline(c['cube']),
+    'helper.weekly_timeline': lambda c: helper.weekly_timeline(c['cube']),
+    'helper.monthwise_timeline': lambda c: helper.monthwise_timeline(c['cube']),
+    'helper.hourly_timeline': lambda c: helper.hourly_timeline(c['cube']),
+    'helper.weekly_heatmap': lambda c: helper.weekly_heatmap(c['cube']),
+    'helper.busy_user_bar': lambda c: helper.busy_user_bar(c['cube']),
+    'helper.busy_user_dataframe': lambda c: helper.busy_user_dataframe(c['cube']),
+    'helper.user_stats': lambda c: helper.user_stats(c['cube']),
+    'helper.chatterbox': lambda c: helper.chatterbox(c['cube'], c['stats']),
+    'helper.keyboard_warrior': lambda c: helper.keyboard_warrior(c['cube'], c['stats']),
+    'helper.media_Paglu': lambda c: helper.media_Paglu(c['cube'], c['stats']),
+    'helper.linkMaster': lambda c: helper.linkMaster(c['cube'], c['stats']),
+    'helper.early_bird': lambda c: helper.early_bird(c['cube'], c['stats']),
+    'helper.nightowl': lambda c: helper.nightowl(c['cube'], c['stats']),
+    'helper.dryReplier': lambda c: helper.dryReplier(c['cube'], c['stats']),
+    'helper.eassyWriter': lambda c: helper.eassyWriter(c['cube'], c['stats']),
+    'helper.ghost': lambda c: helper.ghost(c['cube'], c['stats']),
+    'helper.awards': lambda c: helper.awards(c['cube'], c['stats']),
+    'helper.conversationStarter': lambda c: helper.conversationStarter(c['df']),
+    'helper.most_common_emojis_dataframe': lambda c: helper.most_common_emojis_dataframe(c['df']),
+    'helper.most_common_emojis_dataframe[per_user]': lambda c: helper.most_common_emojis_dataframe(c['df'], per_user=True),
+    'helper.user_word_frequencies': lambda c: helper.user_word_frequencies(c['df']),
+    'helper.create_wordcloud': lambda c: helper.create_wordcloud(c['df']),
+}
+
+# Peak RSS of this process in MB. On Linux the high-water mark is reset before
+# each stage, so it is that stage's peak; elsewhere it is the peak so far.
+def reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as status:
+            return int(re.search(r'VmHWM:\s+(\d+)', status.read()).group(1)) / 1024
+    except (OSError, AttributeError):
+        scale = 1024 if sys.platform != 'darwin' else 1024**2
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+# Run a stage `repeat` times, keeping the fastest time and the largest peak
+def measure(name, function, messages, repeat=1):
+    best, peak, result = float('inf'), 0.0, None
+    for _ in range(repeat):
+        result = None
+        reset_peak_rss()
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+        peak = max(peak, peak_rss_mb())
+    return result, {
+        'stage': name,
+        'seconds': round(best, 4),
+        'messages_per_second': round(messages / best) if best else None,
+        'peak_rss_mb': round(peak, 1),
+    }
+
+# Path of a generated export, written on first use
+def export_path(messages, twelve_hour, users, seed, data_dir=DATA_DIR):
+    os.makedirs(data_dir, exist_ok=True)
+    clock = '12h' if twelve_hour else '24h'
+    path = os.path.join(data_dir, f"synthetic-{messages}-{clock}-u{users}-s{seed}.txt")
+    if not os.path.exists(path):
+        synthetic.write_export(path + '.tmp', messages, users, twelve_hour, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+# Parse one export and time every helper on it
+def run(path, messages, repeat=1, skip=()):
+    stages = []
+
+    def timed(name, function):
+        result, record = measure(name, function, messages, repeat)
+        stages.append(record)
+        print(f"  {name:<48} {record['seconds']:>9.4f}s {record['peak_rss_mb']:>9.1f} MB", flush=True)
+        return result
+
+    def parse(compact):
+        with open(path, 'rb') as export:
+            return preprocess.create_dataframe_from_file(export, compact=compact)
+
+    df = timed('preprocess.create_dataframe_from_file', lambda: parse(False))
+    timed('preprocess.create_dataframe_from_file[compact]', lambda: parse(True))
+    timed('preprocess.compact_dtypes', lambda: preprocess.compact_dtypes(df))
+
+    days = pd.to_datetime(df['date'])
+    context = {
+        'df': df,
+        'cube': helper.build_cube(df),
+        'index': helper.build_row_index(df),
+        # Middle half of the chat, and its most active user
+        'start': (days.min() + (days.max() - days.min()) / 4).date(),
+        'end': (days.max() - (days.max() - days.min()) / 4).date(),
+        'user': df['user'].value_counts().index[0],
+    }
+    context['stats'] = helper.user_stats(context['cube'])
+
+    for name, stage in HELPER_STAGES.items():
+        if name not in skip:
+            timed(name, lambda: stage(context))
+    return len(df), stages
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BENCH_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+# Print the time ratio of every stage against an earlier results file
+def compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    before = {(r['messages'], r['clock'], s['stage']): s for r in baseline['runs'] for s in r['stages']}
+    print(f"\nagainst {baseline.get('commit')} ({os.path.basename(baseline_path)}):")
+    for run_result in results['runs']:
+        for record in run_result['stages']:
+            old = before.get((run_result['messages'], run_result['clock'], record['stage']))
+            if old and old['seconds']:
+                ratio = record['seconds'] / old['seconds']
+                # Changes under 10% or a millisecond are treated as noise
+                noticeable = abs(record['seconds'] - old['seconds']) > 0.001
+                flag = '  slower' if noticeable and ratio > 1.1 else '  faster' if noticeable and ratio < 0.9 else ''
+                print(f"  {run_result['messages']:>9} {run_result['clock']} {record['stage']:<48} "
+                      f"{old['seconds']:>9.4f}s -> {record['seconds']:>9.4f}s  x{ratio:.2f}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time parsing and every helper on synthetic exports")
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k'],
+                        help="message counts, e.g. 10k 100k 1M 10M (default: 10k 100k)")
+    parser.add_argument('--clock', choices=['24h', '12h', 'both'], default='both')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help="runs per stage; the fastest is kept")
+    parser.add_argument('--skip', nargs='*', default=[], help="stage names to leave out (e.g. helper.create_wordcloud)")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="where generated exports are kept")
+    parser.add_argument('--out', help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    commit, dirty = git_commit()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'runs': [],
+    }
+
+    clocks = ['24h', '12h'] if args.clock == 'both' else [args.clock]
+    for size in args.sizes:
+        messages = synthetic.parse_size(size)
+        for clock in clocks:
+            path = export_path(messages, clock == '12h', args.users, args.seed, args.data_dir)
+            print(f"{messages} messages, {clock} ({os.path.getsize(path) / 1024**2:.1f} MB):", flush=True)
+            parsed, stages = run(path, messages, args.repeat, set(args.skip))
+            results['runs'].append({'messages': messages, 'parsed': parsed, 'clock': clock, 'users': args.users,
+                                    'bytes': os.path.getsize(path), 'stages': stages})
+
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        out = os.path.join(RESULTS_DIR, f"{stamp}-{commit or 'nogit'}{'-dirty' if dirty else ''}.json")
+    with open(out, 'w') as results_file:
+        json.dump(results, results_file, indent=1)
+    print(f"\nresults written to {out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import datetime
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import preprocess
+
+# The per-row parser ingestion used before header fields were captured as integers
+def legacy_parse_date_str(date_str):
+    s = re.sub(r'(\d{1,2}:\d{2})\s*([ap]m)\b',
+               lambda m: f"{m.group(1)} {m.group(2).upper()}", date_str, flags=re.IGNORECASE)
+    for fmt in ('%d/%m/%Y, %H:%M - ', '%d/%m/%y, %H:%M - ',
+                '%d/%m/%Y, %I:%M %p - ', '%d/%m/%y, %I:%M %p - '):
+        try:
+            return pd.to_datetime(s, format=fmt)
+        except ValueError:
+            continue
+    return pd.to_datetime(s, dayfirst=True, errors='coerce')
+
+# Build synthetic message headers exactly as they appear in an export
+def synthetic_headers(n, twelve_hour=False, four_digit_year=True, seed=0):
+    rng = random.Random(seed)
+    moment = datetime.datetime(2019, 1, 1)
+    date_fmt = '%d/%m/%Y' if four_digit_year else '%d/%m/%y'
+    headers = []
+    for _ in range(n):
+        moment += datetime.timedelta(minutes=rng.randint(0, 30))
+        if twelve_hour:
+            time_str = moment.strftime('%I:%M').lstrip('0') + ' ' + moment.strftime('%p').lower()
+        else:
+            time_str = moment.strftime('%H:%M')
+        headers.append(f"{moment.strftime(date_fmt)}, {time_str} - ")
+    return pd.Series(headers)
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row string parsing vs integer header fields")
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    parser.add_argument('--twelve-hour', action='store_true')
+    parser.add_argument('--two-digit-year', action='store_true')
+    args = parser.parse_args()
+
+    dates = synthetic_headers(args.messages, args.twelve_hour, not args.two_digit_year)
+
+    start = time.perf_counter()
+    per_row = pd.to_datetime(dates.apply(legacy_parse_date_str))
+    per_row_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fields = dates.str.extract(preprocess.MESSAGE_PATTERN)
+    parts = fields[['day', 'month', 'year', 'hour', 'minute']].astype('int64')
+    vectorized = preprocess.assemble_dates(parts['day'], parts['month'], parts['year'],
+                                           parts['hour'], parts['minute'], fields['ampm'])
+    vectorized_time = time.perf_counter() - start
+
+    assert per_row.equals(vectorized.astype(per_row.dtype))
+
+    print(f"messages:        {args.messages}")
+    print(f"per-row apply:   {per_row_time:.2f}s")
+    print(f"header fields:   {vectorized_time:.2f}s")
+    print(f"speedup:         {per_row_time / vectorized_time:.1f}x")
+
+if __name__ == '__main__':
+    main()
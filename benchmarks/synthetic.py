@@ -0,0 +1,105 @@
+import argparse
+import datetime
+import random
+
+# Vocabulary, emoji (including ZWJ sequences, skin tones, flags and keycaps)
+# and links mixed into generated messages
+WORDS = ["hey", "ok", "lol", "see", "you", "tomorrow", "meeting", "at", "the", "office", "sure",
+         "thanks", "what", "time", "dinner", "tonight", "call", "me", "later", "yes", "no", "maybe",
+         "haha", "send", "photos", "trip", "weekend", "party", "birthday", "happy", "good", "morning",
+         "night", "where", "are", "we", "going", "bro", "yaar", "kya", "scene", "done", "coming"]
+EMOJI = ["😂", "❤️", "👍", "👍🏽", "🙏", "😭", "🔥", "🎉", "😊", "👨‍👩‍👧", "🏳️‍🌈", "🇮🇳", "1️⃣", "🤣", "😍"]
+LINKS = ["https://example.com/{}", "http://news.example.org/story/{}", "www.example.net/p/{}",
+         "https://youtu.be/{}", "example.io/{}"]
+
+# System notices written without a sender
+NOTICES = ["{} added {}", "{} left", "{} changed the group description", "{} changed this group's icon"]
+
+# Message sizes used by the suite's --sizes shorthand
+SIZES = {'10k': 10_000, '100k': 100_000, '1M': 1_000_000, '10M': 10_000_000}
+
+def parse_size(size):
+    return SIZES.get(size) or int(size)
+
+# Group members: a mix of saved names, non-ASCII names and phone numbers,
+# with Zipf-like activity so a few users send most messages
+def members(users, rng):
+    names = []
+    for i in range(users):
+        kind = i % 5
+        if kind == 3:
+            names.append(f"+91 9{rng.randint(1000, 9999)} {rng.randint(10000, 99999)}")
+        elif kind == 4:
+            names.append(f"Ünïcødé {i} 😎")
+        else:
+            names.append(f"User {i}")
+    weights = [1 / (rank + 1) for rank in range(users)]
+    return names, weights
+
+def _text(rng):
+    roll = rng.random()
+    if roll < 0.06:
+        return "<Media omitted>"
+    if roll < 0.07:
+        return "This message was deleted"
+    words = rng.choices(WORDS, k=rng.randint(1, 14))
+    if roll < 0.12:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(LINKS).format(rng.randint(0, 99999)))
+    if rng.random() < 0.25:
+        words.insert(rng.randrange(len(words) + 1), "".join(rng.choices(EMOJI, k=rng.randint(1, 3))))
+    text = " ".join(words)
+    # Multi-line messages continue on lines without a header
+    if rng.random() < 0.04:
+        text += "\n" + " ".join(rng.choices(WORDS, k=rng.randint(1, 8)))
+        if rng.random() < 0.3:
+            text += "\n\n" + " ".join(rng.choices(WORDS, k=rng.randint(1, 8)))
+    return text
+
+def _header(moment, twelve_hour):
+    if twelve_hour:
+        # Android 12-hour exports: 2-digit year, no leading zeros, narrow space before am/pm
+        clock = f"{moment.hour % 12 or 12}:{moment.minute:02d}\u202f{'am' if moment.hour < 12 else 'pm'}"
+        return f"{moment.day}/{moment.month}/{moment.strftime('%y')}, {clock} - "
+    return f"{moment.strftime('%d/%m/%Y, %H:%M')} - "
+
+# Yield the lines of a synthetic export with the given number of messages
+def export_lines(messages, users=50, twelve_hour=False, seed=0):
+    rng = random.Random(seed)
+    names, weights = members(users, rng)
+    moment = datetime.datetime(2019, 1, 1, 8, 0)
+
+    yield _header(moment, twelve_hour) + "Messages and calls are end-to-end encrypted. No one outside of this chat can read or listen to them."
+    for _ in range(messages):
+        moment += datetime.timedelta(seconds=rng.randint(0, 1800))
+        if rng.random() < 0.002:
+            yield _header(moment, twelve_hour) + rng.choice(NOTICES).format(*rng.sample(names, 2))
+        yield _header(moment, twelve_hour) + rng.choices(names, weights)[0] + ": " + _text(rng)
+
+# Write a synthetic export to path, a block of lines at a time
+def write_export(path, messages, users=50, twelve_hour=False, seed=0, block=10_000):
+    with open(path, 'w', encoding='utf-8') as out:
+        lines = []
+        for line in export_lines(messages, users, twelve_hour, seed):
+            lines.append(line)
+            if len(lines) >= block:
+                out.write("\n".join(lines) + "\n")
+                lines = []
+        if lines:
+            out.write("\n".join(lines) + "\n")
+
+# Synthetic export as bytes, for benchmarks that parse from memory
+def synthetic_export(messages, users=50, twelve_hour=False, seed=0):
+    return ("\n".join(export_lines(messages, users, twelve_hour, seed)) + "\n").encode("utf-8")
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic WhatsApp export")
+    parser.add_argument('path')
+    parser.add_argument('--messages', default='100k', help="message count, or 10k/100k/1M/10M")
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--twelve-hour', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_export(args.path, parse_size(args.messages), args.users, args.twelve_hour, args.seed)
+
+if __name__ == '__main__':
+    main()
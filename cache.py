@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import helper
+import preprocess
+import search
+
+# Bump whenever preprocess changes the columns or dtypes it produces (or
+# search changes how messages are tokenized), so entries written by older
+# code are never loaded
+CACHE_VERSION = 4
+
+# Cache settings, overridable through the environment
+CACHE_ENABLED = os.environ.get('CHAT_CACHE_ENABLED', '1') not in ('0', 'false', 'False', 'no')
+CACHE_DIR = os.environ.get('CHAT_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'whatsapp-chat-analyzer'))
+CACHE_MAX_BYTES = int(os.environ.get('CHAT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# Hash the uploaded bytes in chunks so the digest never needs a second copy of the file
+def file_digest(uploaded_file, chunk_size=preprocess.CHUNK_SIZE):
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(chunk_size), b''):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+# Location of a cached entry for a digest: the parsed frame, its cube, its
+# full-text search index, or the checkpoint a later export of the same chat
+# resumes from
+def cache_path(digest, cache_dir=CACHE_DIR, compact=False, kind='frame'):
+    schema = 'compact' if compact else 'full'
+    suffix = {'frame': '.parquet', 'cube': '-cube.parquet', 'search': '-search.npz', 'checkpoint': '.json'}[kind]
+    return os.path.join(cache_dir, f"{digest}-v{CACHE_VERSION}-{schema}{suffix}")
+
+# Remove a file another session may already have removed
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+# Mark an entry as recently used, unless another session just evicted it
+def _touch(path):
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+# Remove least recently used entries until the cache fits under max_bytes.
+# Sessions evict concurrently, so entries may vanish while this runs.
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(('.parquet', '.npz')):
+            path = os.path.join(cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+        # A checkpoint is only useful while its frame is cached
+        if path.endswith('.parquet'):
+            _remove(path[:-len('.parquet')] + '.json')
+
+# Write through a temporary file so readers never see a partial entry. Sessions
+# are threads of one process, so the temporary name must be unique per write,
+# not per process: two sessions may store the same digest at once.
+def _write_atomic(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove(tmp_path)
+        raise
+
+def _write_json(data):
+    def write(path):
+        with open(path, 'w') as out:
+            json.dump(data, out)
+    return write
+
+# Write a parsed frame (and the checkpoint of its export) atomically, then trim the cache
+def store(digest, df, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, compact=False, checkpoint=None):
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_atomic(cache_path(digest, cache_dir, compact), lambda path: df.to_parquet(path, index=False))
+    if checkpoint is not None:
+        _write_atomic(cache_path(digest, cache_dir, compact, 'checkpoint'), _write_json(checkpoint))
+    evict(cache_dir, max_bytes)
+
+# Write the cube of a cached frame next to it
+def store_cube(digest, cube, cache_dir=CACHE_DIR, compact=False):
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_atomic(cache_path(digest, cache_dir, compact, 'cube'), lambda path: cube.to_parquet(path, index=False))
+
+# Load a cached frame or cube, marking it as recently used; None on a miss
+def load(digest, cache_dir=CACHE_DIR, compact=False, kind='frame'):
+    path = cache_path(digest, cache_dir, compact, kind)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        # Unreadable entry (e.g. interrupted write): drop it and parse again
+        _remove(path)
+        return None
+    _touch(path)
+    return df
+
+# Cube for a cached frame: loaded from disk, or built and stored on a miss
+def load_cube(digest, df, cache_dir=CACHE_DIR, compact=False):
+    cube = load(digest, cache_dir, compact, 'cube')
+    if cube is None:
+        cube = helper.build_cube(df)
+        store_cube(digest, cube, cache_dir, compact)
+    cube.attrs['cube'] = True
+    return cube
+
+# Write the search index of a cached frame next to it
+def store_search_index(digest, index, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, compact=False):
+    os.makedirs(cache_dir, exist_ok=True)
+
+    def write(path):
+        with open(path, 'wb') as out:
+            np.savez(out, **search.to_arrays(index))
+    _write_atomic(cache_path(digest, cache_dir, compact, 'search'), write)
+    evict(cache_dir, max_bytes)
+
+# Search index for a cached frame: loaded from disk, or built and stored on a miss
+def load_search_index(digest, df, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, compact=False):
+    path = cache_path(digest, cache_dir, compact, 'search')
+    if os.path.exists(path):
+        try:
+            with np.load(path) as arrays:
+                index = search.from_arrays(arrays)
+        except Exception:
+            # Unreadable entry (e.g. interrupted write): drop it and build again
+            _remove(path)
+        else:
+            if index['size'] == len(df):
+                _touch(path)
+                return index
+
+    index = search.build_index(df['messages'])
+    store_search_index(digest, index, cache_dir, max_bytes, compact)
+    return index
+
+# Cached export this upload continues (same chat, more messages at the end):
+# the digest and checkpoint of the longest such export, or None
+def find_prefix(uploaded_file, cache_dir=CACHE_DIR, compact=False):
+    if not os.path.isdir(cache_dir):
+        return None
+    suffix = os.path.basename(cache_path('', cache_dir, compact, 'checkpoint'))
+    best = None
+    for name in os.listdir(cache_dir):
+        if not name.endswith(suffix):
+            continue
+        try:
+            with open(os.path.join(cache_dir, name)) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+        except (OSError, ValueError):
+            continue
+        if (best is None or checkpoint['size'] > best[1]['size']) and \
+                preprocess.extends_checkpoint(uploaded_file, checkpoint):
+            best = (name[:-len(suffix)], checkpoint)
+    return best
+
+# Parse only what an upload adds to a cached earlier export. The earlier frame
+# keeps its rows up to its last message, which is parsed again together with
+# the new tail; its cube, when cached, is updated from the changed rows only.
+# None when no cached export is a prefix of this one.
+def extend_cached(uploaded_file, digest, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, compact=False):
+    prefix = find_prefix(uploaded_file, cache_dir, compact)
+    if prefix is None:
+        return None
+    prefix_digest, checkpoint = prefix
+    old = load(prefix_digest, cache_dir, compact)
+    if old is None:
+        return None
+
+    tail = preprocess.parse_tail(uploaded_file, checkpoint['offset'])
+    df = preprocess.append_messages(old, tail, checkpoint['tail_rows'], compact)
+    store(digest, df, cache_dir, max_bytes, compact, preprocess.tail_checkpoint(uploaded_file))
+
+    cube = load(prefix_digest, cache_dir, compact, 'cube')
+    if cube is not None:
+        kept = len(old) - checkpoint['tail_rows']
+        store_cube(digest, helper.update_cube(cube, df.iloc[kept:], old.iloc[kept:]), cache_dir, compact)
+    return df
+
+# Parse an uploaded export, reusing the on-disk copy for identical content and
+# extending a cached earlier export of the same chat when this one continues it
+def load_dataframe(uploaded_file, enabled=CACHE_ENABLED, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES,
+                   compact=False, digest=None, workers=1):
+    if not enabled:
+        return preprocess.create_dataframe_from_file(uploaded_file, compact=compact, workers=workers)
+
+    if digest is None:
+        digest = file_digest(uploaded_file)
+    df = load(digest, cache_dir, compact)
+    if df is None:
+        df = extend_cached(uploaded_file, digest, cache_dir, max_bytes, compact)
+    if df is None:
+        df = preprocess.create_dataframe_from_file(uploaded_file, compact=compact, workers=workers)
+        store(digest, df, cache_dir, max_bytes, compact, preprocess.tail_checkpoint(uploaded_file))
+    return df
@@ -0,0 +1,254 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+import helper
+import pools
+import profiling
+
+# Rendered images kept per (file hash, user, start date, end date, chart type)
+CHART_CACHE_SIZE = 256
+
+# Worker processes for parallel rendering (defaults to one per core)
+CHART_WORKERS = int(os.environ.get('CHART_WORKERS', 0)) or os.cpu_count()
+
+_rendered = OrderedDict()
+_cache_lock = threading.Lock()
+
+# pyplot keeps global state, so only one chart is drawn at a time per process
+_render_lock = threading.Lock()
+
+# pyplot and seaborn make up most of a cold start, so they are imported when
+# the first chart is drawn
+@lru_cache(maxsize=None)
+def _plotting():
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+# Shared dark styling for titled charts
+def _style_axes(fig, ax, title, ylabel, xlabel="", label_color='#cccccc'):
+    ax.set_title(title, color='#ffffff', fontsize=16, fontweight='bold', pad=20)
+    ax.set_ylabel(ylabel, color=label_color, fontsize=12)
+    if xlabel:
+        ax.set_xlabel(xlabel, color=label_color, fontsize=12)
+    else:
+        ax.set_xlabel("", color=label_color)
+    ax.set_facecolor('#1a1a1a')
+    fig.patch.set_facecolor('#1a1a1a')
+    ax.tick_params(colors='#cccccc')
+    for spine in ax.spines.values():
+        spine.set_color('#404040')
+
+# Line chart of messages per month
+def monthly_timeline_chart(timeline):
+    plt, sns = _plotting()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.lineplot(x=timeline['time'], y=timeline['messages'], ax=ax, color='#00d4ff', linewidth=3, marker='o', markersize=6)
+    _style_axes(fig, ax, "Messages Per Month", "No. Of Messages")
+
+    # Limit x-axis ticks for readability
+    from matplotlib import ticker
+    ax.xaxis.set_major_locator(ticker.MaxNLocator(nbins=10))
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    return fig
+
+# Line chart of messages per date
+def datewise_timeline_chart(timeline):
+    plt, sns = _plotting()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.lineplot(x=timeline['date'], y=timeline['messages'], ax=ax, color='#ff6b6b', linewidth=2, alpha=0.8)
+    _style_axes(fig, ax, "Messages Per Day", "No. Of Messages")
+    plt.setp(ax.get_xticklabels(), rotation='vertical')
+    return fig
+
+# Bar chart of messages per hour period
+def hourly_timeline_chart(timeline):
+    plt, sns = _plotting()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#ff9ff3', '#54a0ff', '#5f27cd', '#00d2d3', '#ff9f43', '#10ac84', '#ee5a24', '#2e86de', '#a55eea', '#26de81', '#778ca3', '#fd79a8', '#fdcb6e', '#6c5ce7', '#00b894', '#e84393', '#6c5ce7', '#00cec9', '#fd79a8']
+    sns.barplot(x=timeline['period'], y=timeline['messages'], ax=ax, palette=colors[:len(timeline)])
+    _style_axes(fig, ax, "Messages Per Hour", "No. Of Messages")
+    plt.setp(ax.get_xticklabels(), rotation='vertical')
+    return fig
+
+# Bar chart of messages per day of week
+def weekly_timeline_chart(timeline):
+    plt, sns = _plotting()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    weekly_colors = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#ff9ff3', '#54a0ff']
+    sns.barplot(x=timeline['day_name'], y=timeline['messages'], ax=ax, palette=weekly_colors[:len(timeline)])
+    _style_axes(fig, ax, "Messages Per Day", "No. Of Messages")
+    plt.setp(ax.get_xticklabels(), rotation='vertical')
+    return fig
+
+# Bar chart of messages per calendar month
+def monthwise_timeline_chart(timeline):
+    plt, sns = _plotting()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    monthly_colors = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#ff9ff3', '#54a0ff', '#5f27cd', '#00d2d3', '#ff9f43', '#10ac84', '#ee5a24']
+    sns.barplot(x=timeline['month'], y=timeline['messages'], ax=ax, palette=monthly_colors[:len(timeline)])
+    _style_axes(fig, ax, "Messages Per Month", "No. Of Messages")
+    plt.setp(ax.get_xticklabels(), rotation='vertical')
+    return fig
+
+# Annotated day vs hour heatmap
+def weekly_heatmap_chart(table):
+    plt, sns = _plotting()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.heatmap(table, cmap='viridis', ax=ax, cbar_kws={'label': 'Messages'}, annot=True, fmt='.0f', linewidths=0.5)
+
+    ax.set_title("Day-Time Heatmap", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
+    ax.set_ylabel("Day", color='#cccccc', fontsize=12)
+    ax.set_xlabel("Hour Of The Day", color='#cccccc', fontsize=12)
+    ax.set_facecolor('#1a1a1a')
+    fig.patch.set_facecolor('#1a1a1a')
+    ax.tick_params(colors='#cccccc')
+    return fig
+
+# Word cloud laid out from word frequencies (left blank when there are no words)
+def wordcloud_chart(frequencies):
+    plt, _ = _plotting()
+    fig, ax = plt.subplots(figsize=(12, 8))
+    if frequencies:
+        ax.imshow(helper.wordcloud_from_frequencies(frequencies).to_array())
+    ax.axis('off')
+    ax.set_title("Most Common Words in Chat", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
+    return fig
+
+# Pie chart of the top 10 emoji
+def emoji_pie_chart(emoji_frame):
+    plt, _ = _plotting()
+    fig, ax = plt.subplots(figsize=(8, 8))
+    colors = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#ff9ff3', '#54a0ff', '#5f27cd', '#00d2d3', '#ff9f43']
+    wedges, texts, autotexts = ax.pie(
+        emoji_frame['count'].head(10),
+        labels=emoji_frame['emoji'].head(10),
+        autopct="%0.1f%%",
+        colors=colors[:len(emoji_frame.head(10))],
+        startangle=90
+    )
+
+    # Style the pie chart
+    ax.set_title("Top 10 Emojis", color='#ffffff', fontsize=16, fontweight='bold', pad=20)
+    ax.set_facecolor('#1a1a1a')
+    fig.patch.set_facecolor('#1a1a1a')
+
+    # Style the text elements
+    for autotext in autotexts:
+        autotext.set_color('#ffffff')
+        autotext.set_fontweight('bold')
+
+    for text in texts:
+        text.set_color('#cccccc')
+        text.set_fontsize(12)
+    return fig
+
+# Bar chart of the most active users
+def busy_users_chart(timeline):
+    plt, sns = _plotting()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    colors = ['#00d4ff', '#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#feca57', '#ff9ff3', '#54a0ff', '#5f27cd', '#00d2d3']
+    sns.barplot(x=timeline['user'], y=timeline['messages'], ax=ax, palette=colors[:len(timeline)])
+    _style_axes(fig, ax, "Most Busy Users", "Messages", "Users", label_color='#ffffff')
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    fig.tight_layout()
+    return fig
+
+# Save a figure as image bytes (the same settings st.pyplot uses) and release it
+def figure_to_bytes(fig, fmt='png'):
+    plt, _ = _plotting()
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=200, bbox_inches='tight')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+# Chart types by name, so workers can be told what to draw
+CHARTS = {
+    'monthly': monthly_timeline_chart,
+    'daily': datewise_timeline_chart,
+    'hourly': hourly_timeline_chart,
+    'weekly': weekly_timeline_chart,
+    'monthwise': monthwise_timeline_chart,
+    'heatmap': weekly_heatmap_chart,
+    'wordcloud': wordcloud_chart,
+    'emoji': emoji_pie_chart,
+    'busy_users': busy_users_chart,
+}
+
+# Draw one chart from its aggregated data; runs in the app or in a worker
+def draw_chart(chart, data, fmt='png'):
+    return figure_to_bytes(CHARTS[chart](data), fmt)
+
+# Workers use the non-interactive Agg backend
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+def _remember(key, image):
+    with _cache_lock:
+        _rendered[key] = image
+        while len(_rendered) > CHART_CACHE_SIZE:
+            _rendered.popitem(last=False)
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+# Draw a chart here, one at a time (pyplot is not thread-safe), and cache it
+def _draw(key, chart, data, fmt):
+    with profiling.stage(f"charts.{chart}.draw"), _render_lock:
+        image = draw_chart(chart, data, fmt)
+    _remember(key, image)
+    return image
+
+# Start rendering a chart and return a future for its image bytes. load()
+# returns the chart's aggregated data and is only called on a cache miss.
+# With workers the chart is drawn in the shared process pool of that many
+# workers; without them it is drawn here.
+def submit(key, chart, load, workers=None, fmt='png'):
+    key = key + (chart, fmt)
+    with _cache_lock:
+        if key in _rendered:
+            _rendered.move_to_end(key)
+            return _done(_rendered[key])
+
+    with profiling.stage(f"charts.{chart}.data"):
+        data = load()
+
+    if workers is None:
+        return _done(_draw(key, chart, data, fmt))
+
+    future = pools.submit(workers, draw_chart, chart, data, fmt, initializer=_init_worker)
+    future.add_done_callback(lambda f: not f.cancelled() and f.exception() is None and _remember(key, f.result()))
+    # Kept so the chart can still be drawn here if its worker dies
+    future.chart = (key, chart, data, fmt)
+    return future
+
+# Image of a finished future. A worker that died breaks its pool, which fails
+# or cancels every chart still queued there: those are drawn here instead.
+def _image(future):
+    try:
+        return future.result()
+    except (BrokenProcessPool, CancelledError):
+        return _draw(*future.chart)
+
+# Show a finished chart in its placeholder now, or queue it for fill()
+def place(slot, future, pending):
+    if future.done():
+        slot.image(_image(future), width="stretch")
+    else:
+        pending.append((slot, future))
+
+# Write queued charts into their placeholders in the order they finish
+def fill(pending):
+    slots = {future: slot for slot, future in pending}
+    for future in as_completed(slots):
+        slots[future].image(_image(future), width="stretch")
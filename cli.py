@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import helper
+import preprocess
+
+# Tables written for every export, computed from the (user x date x hour) cube
+TABLES = {
+    'monthly_timeline': helper.monthly_timeline,
+    'daily_timeline': helper.datewise_timeline,
+    'weekly_timeline': helper.weekly_timeline,
+    'monthwise_timeline': helper.monthwise_timeline,
+    'hourly_timeline': helper.hourly_timeline,
+    'heatmap': lambda cube: helper.weekly_heatmap(cube).reset_index(),
+    'busy_users': helper.busy_user_dataframe,
+    'user_stats': helper.user_stats,
+}
+
+# Charts rendered with --charts, by name in charts.CHARTS
+CHART_TABLES = {
+    'monthly': 'monthly_timeline',
+    'daily': 'daily_timeline',
+    'hourly': 'hourly_timeline',
+    'weekly': 'weekly_timeline',
+    'monthwise': 'monthwise_timeline',
+    'busy_users': 'busy_users_bar',
+}
+
+# numpy scalars and dates in summaries are written as plain JSON values
+def _to_builtin(value):
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+# Write one table as JSON records or Parquet (which needs string column names)
+def write_table(table, path, fmt):
+    table = table.copy()
+    table.columns = table.columns.map(str)
+    if fmt == 'parquet':
+        table.to_parquet(path + '.parquet', index=False)
+    else:
+        table.to_json(path + '.json', orient='records', date_format='iso', force_ascii=False, indent=1)
+
+# Parse and analyze one export into out_dir/<export name>/. Runs in a worker.
+# matplotlib and wordcloud are only imported when charts are requested.
+def analyze_export(path, out_dir, fmt='json', charts=False, gap=None):
+    start = time.perf_counter()
+    with open(path, 'rb') as export:
+        df = preprocess.create_dataframe_from_file(export)
+    cube = helper.build_cube(df)
+
+    target = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0])
+    os.makedirs(target, exist_ok=True)
+
+    tables = {name: table(cube) for name, table in TABLES.items()}
+    tables['emoji'] = helper.most_common_emojis_dataframe(df)
+    tables['emoji_per_user'] = helper.most_common_emojis_dataframe(df, per_user=True)
+    for name, table in tables.items():
+        write_table(table, os.path.join(target, name), fmt)
+
+    messages, media, words, links = helper.basic_stats(cube)
+    awards = helper.awards(cube, rows=df, gap=gap)
+    summary = {
+        'export': os.path.basename(path),
+        'messages': messages,
+        'media': media,
+        'words': words,
+        'links': links,
+        'users': int(df['user'].nunique()),
+        'first_date': df['date'].min() if len(df) else None,
+        'last_date': df['date'].max() if len(df) else None,
+        'awards': {name: None if award is None else award.to_dict() for name, award in awards.items()},
+    }
+    with open(os.path.join(target, 'summary.json'), 'w', encoding='utf-8') as out:
+        json.dump(summary, out, default=_to_builtin, ensure_ascii=False, indent=1)
+
+    if charts and len(df):
+        import charts as chart_drawing
+        data = dict(tables, busy_users_bar=helper.busy_user_bar(cube).head(10))
+        data = {chart: data[table] for chart, table in CHART_TABLES.items()}
+        data['heatmap'] = helper.weekly_heatmap(cube)
+        data['emoji'] = tables['emoji']
+        data['wordcloud'] = helper.user_cloud_frequencies(helper.user_word_frequencies(df))
+        for chart, chart_data in data.items():
+            with open(os.path.join(target, f"{chart}.png"), 'wb') as image:
+                image.write(chart_drawing.draw_chart(chart, chart_data))
+
+    return len(df), time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory of WhatsApp .txt exports")
+    parser.add_argument('exports', help="directory containing .txt exports")
+    parser.add_argument('-o', '--out', default='analysis', help="output directory (default: analysis)")
+    parser.add_argument('-f', '--format', choices=['json', 'parquet'], default='json', help="table format")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--charts', action='store_true', help="also render the app's charts as PNG")
+    parser.add_argument('--gap', type=int, help="minutes of inactivity that start a new conversation "
+                                                "(default: the first message of each day)")
+    args = parser.parse_args(argv)
+
+    paths = sorted(os.path.join(args.exports, name) for name in os.listdir(args.exports)
+                   if name.lower().endswith('.txt'))
+    if not paths:
+        parser.error(f"no .txt exports in {args.exports}")
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(analyze_export, path, args.out, args.format, args.charts, args.gap): path for path in paths}
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
+            try:
+                messages, seconds = future.result()
+            except Exception as error:
+                failed += 1
+                print(f"{name}: failed: {error!r}", file=sys.stderr)
+            else:
+                print(f"{name}: {messages} messages in {seconds:.2f}s", file=sys.stderr)
+
+    print(f"{len(paths) - failed}/{len(paths)} exports analyzed into {args.out}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
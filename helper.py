@@ -1,37 +1,141 @@
 import pandas as pd
-from urlextract import URLExtract
-from wordcloud import WordCloud
-import emoji
-from collections import Counter
-
-# Initialize URL extractor for finding links in messages
-extract = URLExtract()
+import numpy as np
+import re
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
 
 # Filter dataframe by date range for analysis
 def date_range_dataframe(df, min_date, max_date):
+  # Compact frames store the date as datetime64, which only compares with timestamps
+  if pd.api.types.is_datetime64_any_dtype(df['date']):
+    min_date, max_date = pd.Timestamp(min_date), pd.Timestamp(max_date)
   new_df = df.query('date >= @min_date and date <= @max_date').reset_index(drop=True)
   return new_df
 
+# Placeholder WhatsApp writes for media in exports without media
+MEDIA_MESSAGE = "<Media omitted>"
+
+# Calendar columns carried onto every cube cell (they only depend on date and hour)
+CUBE_CALENDAR = ['year', 'month_num', 'month', 'day_name', 'period']
+
+# Aggregate the chat once into a (user x date x hour) cube. Each cell holds the
+# message, word, media and link counts, so timelines and leaderboards only touch
+# cells instead of messages.
+def build_cube(df):
+  measures = df[['user', 'date', 'hour', 'word_count', 'link_count'] + CUBE_CALENDAR].assign(
+    media=(df['messages'] == MEDIA_MESSAGE).astype('int64'),
+  )
+
+  cube = measures.groupby(['user', 'date', 'hour'], observed=True, sort=False).agg(
+    messages=('word_count', 'size'),
+    words=('word_count', 'sum'),
+    media=('media', 'sum'),
+    links=('link_count', 'sum'),
+    **{column: (column, 'first') for column in CUBE_CALENDAR},
+  ).reset_index()
+
+  cube.attrs['cube'] = True
+  return cube
+
+# Cube measures that add up across cells
+CUBE_MEASURES = ['messages', 'words', 'media', 'links']
+
+# Update a cube for appended rows (and rows they replace) by merging only the
+# affected cells instead of aggregating the whole chat again
+def update_cube(cube, added, removed=None):
+  parts = [cube, build_cube(added)]
+  if removed is not None and len(removed):
+    removed = build_cube(removed)
+    removed[CUBE_MEASURES] = -removed[CUBE_MEASURES]
+    parts.append(removed)
+
+  merged = pd.concat(parts, ignore_index=True).groupby(['user', 'date', 'hour'], observed=True, sort=False).agg(
+    **{column: (column, 'sum') for column in CUBE_MEASURES},
+    **{column: (column, 'first') for column in CUBE_CALENDAR},
+  ).reset_index()
+  merged = merged[merged['messages'] > 0].reset_index(drop=True)
+  if isinstance(cube['user'].dtype, pd.CategoricalDtype):
+    # New senders widen the user categories
+    merged['user'] = merged['user'].astype('category')
+
+  merged.attrs['cube'] = True
+  return merged
+
+# Use the frame as is when it is already a cube, otherwise aggregate it
+def as_cube(df):
+  if df.attrs.get('cube'):
+    return df
+  return build_cube(df)
+
+# Restrict a cube to a date range and, optionally, one user
+def slice_cube(cube, min_date, max_date, user='all'):
+  cube = date_range_dataframe(cube, min_date, max_date)
+  if user != 'all':
+    cube = cube[cube['user'] == user].reset_index(drop=True)
+  return cube
+
+# Row index for range filters. Exported messages are in time order, so each day
+# is one contiguous block of rows (offsets[i]:offsets[i + 1] for days[i]) and each
+# user's rows form an ascending list of positions.
+def build_row_index(df):
+  days = pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]')
+  in_order = bool((days[1:] >= days[:-1]).all())
+  starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) if len(days) else np.array([], dtype=np.intp)
+
+  return {
+    'sorted': in_order,
+    'days': days[starts],
+    'offsets': np.append(starts, len(days)),
+    'users': df.groupby('user', observed=True).indices,
+  }
+
+# Rows [start, stop) covering a date range, found with two binary searches
+def row_range(index, min_date, max_date):
+  lo = np.searchsorted(index['days'], np.datetime64(min_date, 'D'), side='left')
+  hi = np.searchsorted(index['days'], np.datetime64(max_date, 'D'), side='right')
+  return index['offsets'][lo], index['offsets'][hi]
+
+# Filter by date range and user through the row index. All users is a zero-copy
+# slice; one user takes only that user's positions inside the range.
+def filter_rows(df, index, min_date, max_date, user='all'):
+  if not index['sorted']:
+    # Out-of-order export: fall back to scanning, keeping row labels like the slices below
+    dates = df['date']
+    if pd.api.types.is_datetime64_any_dtype(dates):
+      min_date, max_date = pd.Timestamp(min_date), pd.Timestamp(max_date)
+    mask = (dates >= min_date) & (dates <= max_date)
+    if user != 'all':
+      mask &= df['user'] == user
+    return df[mask]
+
+  start, stop = row_range(index, min_date, max_date)
+  if user == 'all':
+    return df.iloc[start:stop]
+
+  positions = index['users'].get(user, np.array([], dtype=np.intp))
+  positions = positions[np.searchsorted(positions, start):np.searchsorted(positions, stop)]
+  return df.take(positions)
+
 # Calculate basic statistics: total messages, media, words, and links
 def basic_stats(df):
-  total_messages = df.shape[0]
+  cube = as_cube(df)
+  total_messages = cube['messages'].sum()
 
   # Count media messages (images, videos, etc.)
-  media_messages = df[df['messages'] == "<Media omitted>"].shape[0]
+  media_messages = cube['media'].sum()
 
   # Calculate total words excluding media messages
-  total_words = (df['word_count'].sum()) - media_messages*2
+  total_words = cube['words'].sum() - media_messages*2
 
-  # Extract and count all URLs from messages
-  links = []
-  for message in df['messages']:
-    links.extend(extract.find_urls(message))
+  # Count all URLs shared in messages
+  links = cube['links'].sum()
 
-  return total_messages, media_messages, total_words, len(links)
+  return total_messages, media_messages, total_words, links
 
 # Group messages by month and year for timeline analysis
 def monthly_timeline(df):
-  timeline = df.groupby(['year', 'month_num', 'month'])['messages'].count().reset_index()
+  timeline = as_cube(df).groupby(['year', 'month_num', 'month'], observed=True)['messages'].sum().reset_index()
   time = []
 
   # Create formatted time labels (e.g., "January-2023")
@@ -43,12 +147,12 @@ def monthly_timeline(df):
 
 # Count messages per date for daily timeline
 def datewise_timeline(df):
-  timeline = df.groupby('date')['messages'].count().reset_index()
+  timeline = as_cube(df).groupby('date')['messages'].sum().reset_index()
   return timeline
 
 # Count messages per day of week, ordered from Monday to Sunday
 def weekly_timeline(df):
-  timeline = df.groupby(['day_name'])['messages'].count().reset_index()
+  timeline = as_cube(df).groupby(['day_name'], observed=True)['messages'].sum().reset_index()
 
   # Define proper day order for sorting
   day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
@@ -61,7 +165,7 @@ def weekly_timeline(df):
 
 # Count messages per month, ordered from January to December
 def monthwise_timeline(df):
-  timeline = df.groupby(['month'])['messages'].count().reset_index()
+  timeline = as_cube(df).groupby(['month'], observed=True)['messages'].sum().reset_index()
 
   # Define proper month order for sorting
   month_order = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
@@ -74,7 +178,7 @@ def monthwise_timeline(df):
 
 # Count messages per hour period (24-hour format)
 def hourly_timeline(df):
-  timeline = df.groupby('period')['messages'].count().reset_index()
+  timeline = as_cube(df).groupby('period', observed=True)['messages'].sum().reset_index()
   
   # Define hour periods in order
   time_period_order = [
@@ -90,7 +194,7 @@ def hourly_timeline(df):
 # Create weekly activity heatmap (day vs hour)
 def weekly_heatmap(df):
   # Pivot table: rows=days, columns=hours, values=message counts
-  user_heatmap = df.pivot_table(index='day_name', columns='period', values='messages', aggfunc='count').fillna(0)
+  user_heatmap = as_cube(df).pivot_table(index='day_name', columns='period', values='messages', aggfunc='sum', observed=True).fillna(0)
 
   # Define proper ordering for time periods and days
   time_period_order = [
@@ -108,169 +212,322 @@ def weekly_heatmap(df):
 
   return user_heatmap
 
-# Generate wordcloud from all text messages (excluding media)
-def create_wordcloud(df):
+# Tokens as WordCloud's own tokenizer finds them
+WORD_PATTERN = re.compile(r"\w[\w']*")
+
+# Words drawn in the cloud (WordCloud's max_words default)
+WORDCLOUD_MAX_WORDS = 200
+
+# Messages joined per tokenizer call while counting words
+WORD_CHUNK_SIZE = 10_000
+
+# Count raw tokens in a column of messages, a chunk at a time, skipping media
+# placeholders. Counters from different users or ranges can simply be added.
+def word_frequencies(messages, chunk_size=WORD_CHUNK_SIZE):
+  counts = Counter()
+  for start in range(0, len(messages), chunk_size):
+    chunk = messages.iloc[start:start + chunk_size]
+    chunk = chunk[chunk != MEDIA_MESSAGE]
+    counts.update(WORD_PATTERN.findall("\n".join(chunk)))
+  return counts
+
+# Raw token counts for every user in one pass over the frame
+def user_word_frequencies(df):
+  return {user: word_frequencies(messages)
+          for user, messages in df.groupby('user', observed=True, sort=False)['messages']}
+
+# Turn raw token counts into cloud frequencies the way WordCloud.process_text
+# would: drop "'s", numbers and stopwords, fold case variants onto the most
+# common spelling, merge simple plurals, then keep the top words
+def clean_word_frequencies(counts, top=WORDCLOUD_MAX_WORDS):
+  # wordcloud pulls in matplotlib, so it is only imported once a cloud is needed
+  from wordcloud import STOPWORDS
+  stopwords = {word.lower() for word in STOPWORDS}
+  cases = {}
+  for word, count in counts.items():
+    if word.lower().endswith("'s"):
+      word = word[:-2]
+    lower = word.lower()
+    if not word or word.isdigit() or lower in stopwords:
+      continue
+    forms = cases.setdefault(lower, {})
+    forms[word] = forms.get(word, 0) + count
+
+  for lower in list(cases):
+    if lower.endswith('s') and not lower.endswith('ss') and lower[:-1] in cases:
+      singular = cases[lower[:-1]]
+      for word, count in cases.pop(lower).items():
+        singular[word[:-1]] = singular.get(word[:-1], 0) + count
+
+  frequencies = Counter({max(forms, key=forms.get): sum(forms.values()) for forms in cases.values()})
+  return dict(frequencies.most_common(top)) if top else dict(frequencies)
+
+# Per-user word tables kept for the last few (file, date range) keys, so
+# switching users sums or picks tables instead of rescanning messages. The
+# cache is shared by every session's thread, so it is only touched under the
+# lock; the tables themselves are counted outside it.
+WORD_TABLE_CACHE_SIZE = 8
+_word_tables = OrderedDict()
+_word_tables_lock = threading.Lock()
+
+def word_tables(key, df):
+  with _word_tables_lock:
+    if key in _word_tables:
+      _word_tables.move_to_end(key)
+      return _word_tables[key]
+
+  tables = user_word_frequencies(df)
+  with _word_tables_lock:
+    _word_tables[key] = tables
+    while len(_word_tables) > WORD_TABLE_CACHE_SIZE:
+      _word_tables.popitem(last=False)
+  return tables
+
+# Cloud frequencies for one user, or everyone, from per-user tables
+def user_cloud_frequencies(tables, user='all', top=WORDCLOUD_MAX_WORDS):
+  if user == 'all':
+    counts = Counter()
+    for table in tables.values():
+      counts.update(table)
+  else:
+    counts = tables.get(user, Counter())
+  return clean_word_frequencies(counts, top)
+
+# Lay out a word cloud from word frequencies
+def wordcloud_from_frequencies(frequencies):
+  from wordcloud import WordCloud
   wc = WordCloud(width=500, height = 500, min_font_size = 10, background_color = "white")
-  # Filter out media messages before generating wordcloud
-  df2 = df[df['messages'] != "<Media omitted>"]
-  df_wc = wc.generate(df2['messages'].str.cat(sep=" "))
-  return df_wc
-
-# Find top 10 most used emojis in messages
-def most_common_emojis_dataframe(df):
-  emojis = []
-  # Extract all emojis from each message
-  for message in df['messages']:
-      emojis.extend([char for char in message if char in emoji.EMOJI_DATA])
-
-  # Count emoji frequencies and return top 10
-  emoji_df = pd.DataFrame(Counter(emojis).most_common(10), columns=['emoji', 'count'])
+  return wc.generate_from_frequencies(frequencies)
+
+# Generate wordcloud from all text messages (excluding media)
+def create_wordcloud(df, top=WORDCLOUD_MAX_WORDS):
+  return wordcloud_from_frequencies(clean_word_frequencies(word_frequencies(df['messages']), top))
+
+# Trie over every sequence in emoji.EMOJI_DATA, built on first use. A node
+# marks the end of a complete emoji with the '' key.
+@lru_cache(maxsize=None)
+def emoji_trie():
+  import emoji
+  trie = {}
+  for sequence in emoji.EMOJI_DATA:
+    node = trie
+    for char in sequence:
+      node = node.setdefault(char, {})
+    node[''] = True
+  return trie
+
+# Walk the text once, taking the longest emoji sequence at each position so ZWJ
+# sequences, skin-tone modifiers, flags and keycaps count as one emoji
+def find_emojis(text):
+  trie = emoji_trie()
+  found = []
+  i, n = 0, len(text)
+  while i < n:
+    node = trie.get(text[i])
+    if node is None:
+      i += 1
+      continue
+
+    j = i + 1
+    end = j if '' in node else None
+    while j < n:
+      node = node.get(text[j])
+      if node is None:
+        break
+      j += 1
+      if '' in node:
+        end = j
+
+    if end is None:
+      i += 1
+    else:
+      found.append(text[i:end])
+      i = end
+  return found
+
+# Count emoji in a column of messages. Every emoji contains a non-ASCII
+# character, so pure-ASCII messages are skipped before the single scan.
+def emoji_counts(messages):
+  return Counter(find_emojis("\n".join(m for m in messages if not m.isascii())))
+
+# Find top 10 most used emojis in messages, overall or for every user
+def most_common_emojis_dataframe(df, per_user=False, top=10):
+  if per_user:
+    frames = [pd.DataFrame(emoji_counts(group['messages']).most_common(top), columns=['emoji', 'count']).assign(user=user)
+              for user, group in df.groupby('user', observed=True)]
+    if not frames:
+      return pd.DataFrame(columns=['user', 'emoji', 'count'])
+    return pd.concat(frames, ignore_index=True)[['user', 'emoji', 'count']]
+
+  # Count emoji frequencies and return the top ones
+  emoji_df = pd.DataFrame(emoji_counts(df['messages']).most_common(top), columns=['emoji', 'count'])
   return emoji_df
 
 # Count messages per user for bar plot
 def busy_user_bar(df):
-  return df.groupby('user')['messages'].count().reset_index()
+  return as_cube(df).groupby('user', observed=True)['messages'].sum().reset_index()
 
 # Calculate message percentage per user (excluding Meta AI)
 def busy_user_dataframe(df):
-  df2 = df.groupby('user')['messages'].count().reset_index()
+  df2 = as_cube(df).groupby('user', observed=True)['messages'].sum().reset_index()
   total_messages = df2['messages'].sum()
   # Calculate percentage contribution of each user
   df2['percentage'] = round((df2['messages']/ total_messages)*100,2)
   df2 = df2.sort_values('percentage', ascending=False)
-  df2 = df2.drop(columns='messages', axis=1)
+  df2 = df2.drop(columns='messages')
   
   return df2
 
-# Find user with most messages (excluding Meta AI)
-def chatterbox(df):
-  df2 = df.groupby('user')['messages'].count().reset_index()
-  df2 = df2.sort_values('messages', ascending=False)
-
-  # Filter out Meta AI from analysis
-  df2 = df2[df2['user'] != 'Meta AI']
+# Hour windows for the early bird (5 AM - 8 AM) and night owl (10 PM - 2 AM) awards
+EARLY_HOURS = [5, 6, 7, 8]
+NIGHT_HOURS = [22, 23, 0, 1, 2]
+
+# Per-user sums taken in the one grouped aggregation behind every award: a cube
+# measure summed over all cells, or only over the cells of an hour window
+USER_METRICS = {
+  'messages': ('messages', None),
+  'words': ('words', None),
+  'media': ('media', None),
+  'links': ('links', None),
+  'early': ('messages', EARLY_HOURS),
+  'night': ('messages', NIGHT_HOURS),
+}
+
+# Per-user leaderboard metrics (USER_METRICS plus mean words) from one grouped
+# aggregation over the cube. The input frame is never modified.
+def user_stats(df):
+  cube = as_cube(df)
+  masks = {}
+  sums = {}
+  for name, (measure, hours) in USER_METRICS.items():
+    if hours is None:
+      sums[name] = cube[measure]
+    else:
+      if tuple(hours) not in masks:
+        masks[tuple(hours)] = cube['hour'].isin(hours)
+      sums[name] = cube[measure].where(masks[tuple(hours)], 0)
+  stats = pd.DataFrame(sums).groupby(cube['user'], observed=True).sum()
+
+  stats['mean_words'] = (stats['words'] / stats['messages']).round(2)
+  return stats.reset_index()
+
+# Awards, each declared as a user_stats column to rank: the label the winning
+# value is reported under, whether the lowest value wins, and whether users
+# with none of it are left out. A new award is one more entry here (and in
+# USER_METRICS when it needs another sum).
+AWARDS = {
+  'chatterbox': {'metric': 'messages', 'label': 'messages'},
+  'keyboard_warrior': {'metric': 'words', 'label': 'word_count'},
+  'media_sharer': {'metric': 'media', 'label': 'messages', 'nonzero': True},
+  'link_master': {'metric': 'links', 'label': 'link_count'},
+  'early_bird': {'metric': 'early', 'label': 'messages', 'nonzero': True},
+  'night_owl': {'metric': 'night', 'label': 'messages', 'nonzero': True},
+  'dry_replier': {'metric': 'mean_words', 'label': 'word_count', 'lowest': True},
+  'essay_writer': {'metric': 'mean_words', 'label': 'word_count'},
+  'ghost': {'metric': 'messages', 'label': 'messages', 'lowest': True},
+}
+
+# Stats of the users who can win awards (everyone but Meta AI)
+def _contenders(df, stats=None):
+  stats = user_stats(df) if stats is None else stats
+  return stats[stats['user'] != 'Meta AI']
+
+# Winner of one award among the contenders, or None when nobody qualifies.
+# Ties go to the first user, as with idxmax/idxmin.
+def _winner(contenders, award):
+  values = contenders[award['metric']].to_numpy()
+  candidates = np.flatnonzero(values > 0) if award.get('nonzero') else np.arange(len(values))
+  if len(candidates) == 0:
+    return None
+
+  pick = candidates[(np.argmin if award.get('lowest') else np.argmax)(values[candidates])]
+  return pd.Series({'user': contenders['user'].iloc[pick], award['label']: values[pick]})
+
+# Every award winner by name, from one aggregation and one pass over the
+# per-user stats. The conversation starter needs the messages themselves,
+# so it is included when their frame is passed as rows (see conversationStarter
+# for gap).
+def awards(df, stats=None, rows=None, gap=None):
+  contenders = _contenders(df, stats)
+  winners = {name: _winner(contenders, award) for name, award in AWARDS.items()}
+  if rows is not None:
+    winners['conversation_starter'] = conversationStarter(rows, gap)
+  return winners
 
-  return df2.loc[df2['messages'].idxmax()]
+# Find user with most messages (excluding Meta AI)
+def chatterbox(df, stats=None):
+  return _winner(_contenders(df, stats), AWARDS['chatterbox'])
 
 # Find user who wrote most words (excluding Meta AI)
-def keyboard_warrior(df):
-  df2 = df.groupby('user')['word_count'].sum().reset_index()
-  df2 = df2.sort_values('word_count', ascending=False)
-
-  # Filter out Meta AI from analysis
-  df2 = df2[df2['user'] != 'Meta AI']
-
-  return df2.loc[df2['word_count'].idxmax()]
+def keyboard_warrior(df, stats=None):
+  return _winner(_contenders(df, stats), AWARDS['keyboard_warrior'])
 
 # Find user who shared most media (excluding Meta AI)
-def media_Paglu(df):
-  df2 = df.query('messages == "<Media omitted>"')
-  df2 = df2.groupby('user')['messages'].count().reset_index().sort_values('messages', ascending=False)
-
-  # Filter out Meta AI from analysis
-  df2 = df2[df2['user'] != 'Meta AI']
-
-  return df2.loc[df2['messages'].idxmax()]
+def media_Paglu(df, stats=None):
+  return _winner(_contenders(df, stats), AWARDS['media_sharer'])
 
 # Find user who shared most links (excluding Meta AI)
-def linkMaster(df):
-  extractor = URLExtract()
-
-  # Count links in each message
-  df['link_count'] = df['messages'].apply(lambda msg: len(extractor.find_urls(msg)))
-
-  # Sum link counts per user
-  df2 = df.groupby('user', as_index=False)['link_count'].sum()
-
-  # Filter out Meta AI from analysis
-  df2 = df2[df2['user'] != 'Meta AI']
-
-  return df2.loc[df2['link_count'].idxmax()]
+def linkMaster(df, stats=None):
+  return _winner(_contenders(df, stats), AWARDS['link_master'])
   
 # Find user who messages most between 5 AM - 8 AM (early bird)
-def early_bird(df):
-    # Filter messages sent between 5 AM and 8 AM
-    df_early = df[(df['hour'] >= 5) & (df['hour'] <= 8)]
-    if df_early.empty:
-        return None
-    
-    df2 = df_early.groupby('user')['messages'].count().reset_index()
-    df2 = df2.sort_values('messages', ascending=False)
-
-    # Filter out Meta AI from analysis
-    df2 = df2[df2['user'] != 'Meta AI']
-
-    return df2.loc[df2['messages'].idxmax()]
+def early_bird(df, stats=None):
+  return _winner(_contenders(df, stats), AWARDS['early_bird'])
 
 # Find user who messages most between 10 PM - 2 AM (night owl)
-def nightowl(df):
-    # Filter messages sent between 10 PM and 2 AM (crosses midnight)
-    df_night = df[(df['hour'] >= 22) | (df['hour'] <= 2)]
-    if df_night.empty:
-        return None
-    
-    df2 = df_night.groupby('user')['messages'].count().reset_index()
-    df2 = df2.sort_values('messages', ascending=False)
-
-    # Filter out Meta AI from analysis
-    df2 = df2[df2['user'] != 'Meta AI']
-
-    return df2.loc[df2['messages'].idxmax()]
+def nightowl(df, stats=None):
+  return _winner(_contenders(df, stats), AWARDS['night_owl'])
 
 # Find user with lowest average words per message (dry replier)
-def dryReplier(df):
-    # Calculate word count for each message
-    df['word_count'] = df['messages'].apply(lambda x: len(x.split()))
-    df2 = df.groupby('user')['word_count'].mean().reset_index()
-    df2['word_count'] = df2['word_count'].round(2)
-    
-    # Remove Meta AI from analysis
-    df2 = df2[df2['user'] != 'Meta AI']
-    
-    return df2.loc[df2['word_count'].idxmin()]
+def dryReplier(df, stats=None):
+  return _winner(_contenders(df, stats), AWARDS['dry_replier'])
 
 # Find user with highest average words per message (essay writer)
-def eassyWriter(df):
-    # Calculate word count for each message
-    df['word_count'] = df['messages'].apply(lambda x: len(x.split()))
-    df2 = df.groupby('user')['word_count'].mean().reset_index()
-    df2['word_count'] = df2['word_count'].round(2)
-    
-    # Remove Meta AI from analysis
-    df2 = df2[df2['user'] != 'Meta AI']
-    
-    return df2.loc[df2['word_count'].idxmax()]
-
-# Find user with least messages in the group (ghost)
-def ghost(df):
-    df2 = df.groupby('user')['messages'].count().reset_index()
-    df2 = df2.sort_values('messages', ascending=False)
-    
-    ghost_user = df2.loc[df2['messages'].idxmin()]
-    
-    # If Meta AI has least messages, find the next user
-    if ghost_user['user'] == 'Meta AI':
-        df2 = df2[df2['user'] != 'Meta AI']
-        ghost_user = df2.loc[df2['messages'].idxmin()]
-    
-    return ghost_user
-
-# Find user who starts most conversations (first message of the day)
-def conversationStarter(df):
-  # Filter messages after 6 AM (reasonable start time)
-  df = df[df['hour'] >= 6]
-
-  # Sort by date, hour, minute to find first message of each day
-  df = df.sort_values(by=['date', 'hour', 'minute'])
-
-  # Get first message of each day
-  first_senders = df.groupby('date').first().reset_index()
-
-  # Count how many times each user sent first message
-  starter_counts = first_senders['user'].value_counts().reset_index()
+def eassyWriter(df, stats=None):
+  return _winner(_contenders(df, stats), AWARDS['essay_writer'])
+
+# Find user with least messages in the group (ghost, excluding Meta AI)
+def ghost(df, stats=None):
+  return _winner(_contenders(df, stats), AWARDS['ghost'])
+
+# Hour before which the first message of a day does not count as a conversation start
+DAY_START_HOUR = 6
+
+# Minutes since the epoch of every message, from its date, hour and minute
+def message_minutes(df):
+  days = pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]').astype('int64')
+  return days * 1440 + df['hour'].to_numpy().astype('int64') * 60 + df['minute'].to_numpy().astype('int64')
+
+# Find user who starts most conversations. By default a conversation starts with
+# the first message of each day from 6 AM; with gap (in minutes) it starts with
+# any message sent more than gap minutes after the one before it. Exports are in
+# time order, so starters are found in one linear pass; only an out-of-order
+# frame is (stably) sorted first.
+def conversationStarter(df, gap=None):
+  minutes = message_minutes(df)
+  users = df['user']
+  if (minutes[1:] < minutes[:-1]).any():
+    order = np.argsort(minutes, kind='stable')
+    minutes, users = minutes[order], users.iloc[order]
+
+  if gap is None:
+    # First message of each day, ignoring messages before 6 AM
+    positions = np.flatnonzero(minutes % 1440 >= DAY_START_HOUR * 60)
+    days = minutes[positions] // 1440
+    starts = positions[np.r_[True, days[1:] != days[:-1]]] if len(positions) else positions
+  else:
+    # First message after each gap of inactivity (and the chat's first message)
+    starts = np.flatnonzero(np.r_[True, np.diff(minutes) > gap]) if len(minutes) else np.array([], dtype=np.intp)
+  if not len(starts):
+    return None
+
+  # Count how many times each user started a conversation
+  starter_counts = users.iloc[starts].value_counts().reset_index()
   starter_counts.columns = ['user', 'count']
 
   # Remove Meta AI from analysis
   starter_counts = starter_counts[starter_counts['user'] != 'Meta AI']
+  if starter_counts.empty:
+    return None
   
-  return starter_counts.iloc[0]
\ No newline at end of file
+  return starter_counts.iloc[0]
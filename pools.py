@@ -0,0 +1,47 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Process pools shared by every session of this server, one per worker count
+# and initializer. Workers are spawned rather than forked because the
+# Streamlit server is multi-threaded.
+_pools = {}
+_pools_lock = threading.Lock()
+
+def spawn_pool(workers, initializer=None):
+    with _pools_lock:
+        pool = _pools.get((workers, initializer))
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=initializer)
+            _pools[(workers, initializer)] = pool
+        return pool
+
+# Forget a pool whose worker died, so the next task spawns a fresh one
+def _discard(pool):
+    with _pools_lock:
+        for key, cached in list(_pools.items()):
+            if cached is pool:
+                del _pools[key]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _discard_if_broken(pool, future):
+    if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+        _discard(pool)
+
+# Run fn(*args) in the shared pool and return its future. A worker that dies
+# (e.g. killed for running out of memory on a large shard) breaks its whole
+# pool: that pool is replaced as soon as one of its futures fails with
+# BrokenProcessPool, instead of failing every later task until a restart.
+def submit(workers, fn, *args, initializer=None):
+    pool = spawn_pool(workers, initializer)
+    try:
+        future = pool.submit(fn, *args)
+    except BrokenProcessPool:
+        # Broke after its last task was handed out: replace it and submit again
+        _discard(pool)
+        pool = spawn_pool(workers, initializer)
+        future = pool.submit(fn, *args)
+    future.add_done_callback(lambda done: _discard_if_broken(pool, done))
+    return future
@@ -1,81 +1,361 @@
 import pandas as pd
+import numpy as np
+import codecs
+import hashlib
+import os
 import re
+from collections import deque
+from functools import lru_cache
 
-def create_dataframe_from_file(uploaded_file):
-    bytes_data = uploaded_file.getvalue()
-    content = bytes_data.decode("utf-8")
-    # Normalize narrow/non-breaking spaces that may precede am/pm
-    content = content.replace('\u202f', ' ').replace('\xa0', ' ')
-    
-    # Support optional AM/PM (e.g., "11:40 am - ")
-    pattern = r'\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}(?:\s*[apAP][mM])?\s-\s'
-    messages = re.split(pattern, content)[1:]
-
-    dates = re.findall(pattern, content)
-
-    df = pd.DataFrame({'user_message': messages, 'date': dates})
-    
-    # Robust parser: try 24h and 12h formats (2- or 4-digit years), fallback to inference
-    def parse_date_str(date_str: str):
-        s = date_str.replace('\u202f', ' ').replace('\xa0', ' ')
-        s = re.sub(r'(\d{1,2}:\d{2})\s*([ap]m)\b',
-                   lambda m: f"{m.group(1)} {m.group(2).upper()}", s, flags=re.IGNORECASE)
-        for fmt in (
-            '%d/%m/%Y, %H:%M - ',
-            '%d/%m/%y, %H:%M - ',
-            '%d/%m/%Y, %I:%M %p - ',
-            '%d/%m/%y, %I:%M %p - ',
-        ):
-            try:
-                return pd.to_datetime(s, format=fmt)
-            except ValueError:
+import pools
+import profiling
+
+# Support optional AM/PM (e.g., "11:40 am - ")
+HEADER_PATTERN = re.compile(r'\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}(?:\s*[apAP][mM])?\s-\s')
+
+# The same header with its timestamp fields captured, followed by the sender:
+# everything up to the first ':' of the message, never running into the next header
+MESSAGE_PATTERN = re.compile(
+    r'(?P<day>\d{1,2})/(?P<month>\d{1,2})/(?P<year>\d{2,4}),\s'
+    r'(?P<hour>\d{1,2}):(?P<minute>\d{2})(?:\s*(?P<ampm>[apAP][mM]))?\s-\s'
+    r'(?:(?P<sender>(?:(?!' + HEADER_PATTERN.pattern + r')[^:])*):)?'
+)
+
+# Named groups carried for every message, followed by the message text
+HEADER_FIELDS = ('day', 'month', 'year', 'hour', 'minute', 'ampm', 'sender')
+
+# Category orders for the low-cardinality calendar columns
+DAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MONTH_ORDER = ["January", "February", "March", "April", "May", "June", "July",
+               "August", "September", "October", "November", "December"]
+PERIOD_ORDER = [
+    '00-1', '1-2', '2-3', '3-4', '4-5', '5-6', '6-7', '7-8', '8-9', '9-10',
+    '10-11', '11-12', '12-13', '13-14', '14-15', '15-16', '16-17', '17-18',
+    '18-19', '19-20', '20-21', '21-22', '22-23', '23-00'
+]
+
+# Narrow dtypes used by the compact schema
+COMPACT_DTYPES = {
+    'user': 'category',
+    'month': pd.CategoricalDtype(MONTH_ORDER, ordered=True),
+    'day_name': pd.CategoricalDtype(DAY_ORDER, ordered=True),
+    'year': 'int16',
+    'month_num': 'int8',
+    'day': 'int8',
+    'hour': 'int8',
+    'minute': 'int8',
+}
+
+# Bytes read from the upload per step, and rows handed on per batch
+CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 50_000
+
+# Bytes read per shard in parallel ingest, and worker processes (one per core by default)
+SHARD_SIZE = 8 << 20
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', 0)) or os.cpu_count()
+
+# Normalize narrow/non-breaking spaces that may precede am/pm
+def normalize_text(text):
+    return text.replace('\u202f', ' ').replace('\xa0', ' ')
+
+# Read the export in byte chunks and yield rows of header fields plus message text
+# in batches. Only the message after the last header seen so far is carried between
+# chunks, so a message (or header) split across a chunk boundary is completed by the
+# next read. Messages without a sender (system notices) are skipped.
+def iter_message_batches(uploaded_file, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE):
+    uploaded_file.seek(0)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    carry = ""
+    batch = []
+    started = False
+
+    while True:
+        chunk = uploaded_file.read(chunk_size)
+        final = not chunk
+        carry += normalize_text(decoder.decode(chunk, final=final))
+
+        if not started:
+            first = HEADER_PATTERN.search(carry)
+            if first is None:
+                if final:
+                    break
+                # No header yet: keep only enough text to complete one split across chunks
+                carry = carry[-64:]
                 continue
-        return pd.to_datetime(s, dayfirst=True, errors='coerce')
+            # Text before the first header (e.g. the encryption notice) is not a message
+            carry = carry[first.start():]
+            started = True
+
+        headers = list(MESSAGE_PATTERN.finditer(carry))
+
+        # Every header except the last is followed by a complete message
+        for current, following in zip(headers, headers[1:]):
+            if current.group('sender') is not None:
+                batch.append(current.group(*HEADER_FIELDS) + (carry[current.end():following.start()],))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+        if final:
+            last = headers[-1]
+            if last.group('sender') is not None:
+                batch.append(last.group(*HEADER_FIELDS) + (carry[last.end():],))
+            break
+
+        carry = carry[headers[-1].start():]
 
-    df['date'] = df['date'].apply(parse_date_str)
+    if batch:
+        yield batch
 
-    users = []
-    messages = []
+# Build timestamps straight from the integer header fields: 2-digit years follow
+# strptime's %y pivot and am/pm shifts 12-hour clocks onto 0-23
+def assemble_dates(day, month, year, hour, minute, ampm):
+    year = year.where(year >= 100, year + 2000 - 100 * (year >= 69))
 
-    for msg in df['user_message']:
-        if ":" in msg:
-            users.append(msg.split(":", 1)[0])     # username
-            messages.append(msg.split(":", 1)[1].strip())  # message text
-        else:
-            users.append(None)      # or "System"
-            messages.append(msg.strip())
+    meridiem = ampm.str.lower()
+    twelve_hour = meridiem.notna() & (hour <= 12)
+    hour = hour.where(~twelve_hour, hour % 12 + 12 * (meridiem == 'pm'))
 
-    df['user'] = users
-    df['messages'] = messages
-    df.drop(columns = ['user_message'], inplace = True)
+    return pd.to_datetime(pd.DataFrame({'year': year, 'month': month, 'day': day,
+                                        'hour': hour, 'minute': minute}), errors='coerce')
+
+# Turn one batch of raw rows into date, user and messages columns
+def batch_to_dataframe(batch):
+    raw = pd.DataFrame(batch, columns=HEADER_FIELDS + ('text',))
+    parts = raw[['day', 'month', 'year', 'hour', 'minute']].astype('int64')
+
+    with profiling.stage('preprocess.timestamps'):
+        dates = assemble_dates(parts['day'], parts['month'], parts['year'],
+                               parts['hour'], parts['minute'], raw['ampm'])
+
+    df = pd.DataFrame({
+        'date': dates,
+        'user': raw['sender'],
+        'messages': raw['text'].str.strip(),
+    })
 
     df.dropna(inplace=True)
 
-    df['only_date'] = df['date'].dt.date
-    df['year'] = df['date'].dt.year
-    df['month_num'] = df['date'].dt.month
-    df['month'] = df['date'].dt.month_name()
-    df['day'] = df['date'].dt.day
-    df['day_name'] = df['date'].dt.day_name()
-    df['hour'] = df['date'].dt.hour
-    df['minute'] = df['date'].dt.minute
+    return df
+
+# URL extractor for finding links in messages. URLExtract loads its TLD list
+# when constructed, so it is built on first use and kept.
+@lru_cache(maxsize=None)
+def url_extractor():
+    from urlextract import URLExtract
+    return URLExtract()
+
+# Count URLs per message. Only messages containing '.' or 'http' can hold a
+# link, so the rest never reach URLExtract.
+def count_links(messages):
+    extract = url_extractor()
+    counts = pd.Series(0, index=messages.index, dtype='int64')
+    candidates = messages.str.contains('.', regex=False) | messages.str.contains('http', regex=False)
+    counts[candidates] = messages[candidates].map(lambda msg: len(extract.find_urls(msg)))
+    return counts
 
-    period = []
-    for hour in df[['day_name', 'hour']]['hour']:
-        if hour == 23:
-            period.append(str(hour) + "-" + str('00'))
-        elif hour == 0:
-            period.append(str('00') + "-" + str(hour + 1))
-        else:
-            period.append(str(hour) + "-" + str(hour + 1))
+# Convert a parsed frame to the compact schema: categoricals for the string
+# columns, small integers for calendar fields and datetime64 for the date
+def compact_dtypes(df):
+    df = df.astype(COMPACT_DTYPES)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
 
-    df['period'] = period
+# Per-column memory in bytes before and after converting to the compact schema
+def memory_report(df):
+    compact = df if df['user'].dtype == 'category' else compact_dtypes(df)
+    report = pd.DataFrame({
+        'before': df.memory_usage(deep=True, index=False),
+        'after': compact.memory_usage(deep=True, index=False),
+    })
+    report.loc['total'] = report.sum()
+    report['saved'] = (1 - report['after'] / report['before']).round(3)
+    return report
 
-    df['word_count'] = df['messages'].str.split().str.len()
+# Period label for each hour of the day, indexed by hour
+PERIOD_DTYPE = pd.CategoricalDtype(PERIOD_ORDER, ordered=True)
+
+# Month and weekday names indexed by month - 1 and weekday (Monday = 0)
+MONTH_NAMES = np.array(MONTH_ORDER, dtype=object)
+DAY_NAMES = np.array(DAY_ORDER, dtype=object)
+
+# Calendar fields, hour period, word and link counts for a frame of date, user
+# and messages; the timestamp is replaced by its calendar date. Every calendar
+# field comes from one datetime64 array truncated to years, months and days.
+def add_derived_columns(df):
+    with profiling.stage('preprocess.calendar'):
+        stamps = df['date'].to_numpy(dtype='datetime64[ns]')
+        days = stamps.astype('datetime64[D]')
+        months = stamps.astype('datetime64[M]')
+        years = stamps.astype('datetime64[Y]')
+        minutes = (stamps - days).astype('timedelta64[m]').astype('int32')
+
+        month_num = (months - years.astype('datetime64[M]')).astype('int32') + 1
+        hour = minutes // 60
+
+        df['only_date'] = days.astype(object)
+        df['year'] = years.astype('int32') + 1970
+        df['month_num'] = month_num
+        df['month'] = MONTH_NAMES[month_num - 1]
+        df['day'] = (days - months.astype('datetime64[D]')).astype('int32') + 1
+        # 1970-01-01 was a Thursday
+        df['day_name'] = DAY_NAMES[(days.astype('int64') + 3) % 7]
+        df['hour'] = hour
+        df['minute'] = minutes % 60
+        df['period'] = pd.Categorical.from_codes(hour, dtype=PERIOD_DTYPE)
+
+    with profiling.stage('preprocess.word_count'):
+        # Runs of non-whitespace, the same words str.split() finds, without building lists
+        df['word_count'] = df['messages'].str.count(r'\S+')
+    with profiling.stage('preprocess.link_count'):
+        df['link_count'] = count_links(df['messages'])
 
     df.drop(columns = ['date'], inplace=True)
     df.rename(columns={'only_date':'date'}, inplace=True)
 
-    df.reset_index(drop = True, inplace = True)
+    return df
+
+# Position of the last message header that starts a line, or None. Cutting the
+# text there never splits a message or a header.
+def last_header_start(text):
+    newline = len(text)
+    while True:
+        newline = text.rfind('\n', 0, newline)
+        if newline < 0:
+            return None
+        if HEADER_PATTERN.match(text, newline + 1):
+            return newline + 1
+
+# Split the export into decoded, normalized shards of roughly shard_size bytes.
+# Every shard but the first starts at a message header.
+def iter_shards(uploaded_file, shard_size=SHARD_SIZE):
+    uploaded_file.seek(0)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    carry = ""
+
+    while True:
+        chunk = uploaded_file.read(shard_size)
+        carry += normalize_text(decoder.decode(chunk, final=not chunk))
+        if not chunk:
+            break
+        cut = last_header_start(carry)
+        if cut:
+            yield carry[:cut]
+            carry = carry[cut:]
+
+    if carry:
+        yield carry
+
+# Parse one shard into a frame with every derived column; runs in a worker
+def parse_shard(text):
+    first = HEADER_PATTERN.search(text)
+    if first is None:
+        return add_derived_columns(batch_to_dataframe([]))
+
+    # Text before the first header (e.g. the encryption notice) is not a message
+    headers = list(MESSAGE_PATTERN.finditer(text, first.start()))
+    ends = [following.start() for following in headers[1:]] + [len(text)]
+    rows = [header.group(*HEADER_FIELDS) + (text[header.end():end],)
+            for header, end in zip(headers, ends) if header.group('sender') is not None]
+
+    return add_derived_columns(batch_to_dataframe(rows))
+
+# Parse shards in the shared process pool, keeping at most two per worker in
+# flight, and return the partial frames in file order
+def parse_shards_parallel(uploaded_file, workers=PARSE_WORKERS, shard_size=SHARD_SIZE):
+    in_flight = deque()
+    frames = []
+    for shard in iter_shards(uploaded_file, shard_size):
+        in_flight.append(pools.submit(workers, parse_shard, shard))
+        if len(in_flight) >= 2 * workers:
+            frames.append(in_flight.popleft().result())
+    frames.extend(future.result() for future in in_flight)
+    return frames
+
+# Byte offset of the last line-initial message header (0 if there is none),
+# decoding growing windows from the end of the file
+def last_header_offset(uploaded_file, window=CHUNK_SIZE):
+    size = uploaded_file.seek(0, os.SEEK_END)
+    while True:
+        start = max(0, size - window)
+        uploaded_file.seek(start)
+        data = uploaded_file.read(size - start)
+        # Begin on a character boundary
+        skip = 0
+        while skip < len(data) and data[skip] & 0xC0 == 0x80:
+            skip += 1
+        text = data[skip:].decode('utf-8', errors='replace')
+        cut = last_header_start(text)
+        if cut is not None:
+            return start + skip + len(text[:cut].encode('utf-8', errors='replace'))
+        if start == 0:
+            return 0
+        window *= 2
+
+# Where a later export of the same chat can resume: the offset of the last
+# message, a checksum of its bytes, the file size and the number of rows
+# parsed from that message (it may continue in a longer export)
+def tail_checkpoint(uploaded_file):
+    offset = last_header_offset(uploaded_file)
+    uploaded_file.seek(offset)
+    data = uploaded_file.read()
+    uploaded_file.seek(0)
+    return {
+        'offset': offset,
+        'size': offset + len(data),
+        'checksum': hashlib.sha256(data).hexdigest(),
+        'tail_rows': len(parse_shard(normalize_text(data.decode('utf-8', errors='replace')))),
+    }
+
+# True when the upload starts with the export a checkpoint was taken from:
+# it is longer, and the last message's bytes sit unchanged at the same offset
+def extends_checkpoint(uploaded_file, checkpoint):
+    size = uploaded_file.seek(0, os.SEEK_END)
+    if size <= checkpoint['size']:
+        uploaded_file.seek(0)
+        return False
+    uploaded_file.seek(checkpoint['offset'])
+    data = uploaded_file.read(checkpoint['size'] - checkpoint['offset'])
+    uploaded_file.seek(0)
+    return hashlib.sha256(data).hexdigest() == checkpoint['checksum']
+
+# Parse the export from a byte offset that starts a message header
+def parse_tail(uploaded_file, offset):
+    uploaded_file.seek(offset)
+    text = normalize_text(uploaded_file.read().decode('utf-8'))
+    uploaded_file.seek(0)
+    return parse_shard(text)
+
+# Replace the rows of the checkpoint's last message with the parsed tail
+def append_messages(df, tail, tail_rows, compact=False):
+    if compact:
+        tail = compact_dtypes(tail)
+    df = pd.concat([df.iloc[:len(df) - tail_rows], tail], ignore_index=True)
+    if compact:
+        # New senders widen the user categories
+        df['user'] = df['user'].astype('category')
+    return df
+
+# Parse an export. With workers > 1 the text is split at header boundaries and
+# the shards are parsed in a process pool, then concatenated in order.
+def create_dataframe_from_file(uploaded_file, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, compact=False,
+                               workers=1):
+    if workers > 1:
+        with profiling.stage('preprocess.parse_shards'):
+            frames = [frame for frame in parse_shards_parallel(uploaded_file, workers) if len(frame)]
+        with profiling.stage('preprocess.concat'):
+            df = pd.concat(frames, ignore_index=True) if frames else parse_shard("")
+    else:
+        with profiling.stage('preprocess.parse'):
+            frames = [batch_to_dataframe(batch)
+                      for batch in iter_message_batches(uploaded_file, chunk_size, batch_size)]
+            if not frames:
+                frames = [batch_to_dataframe([])]
+            df = pd.concat(frames, ignore_index=True)
+        df = add_derived_columns(df)
+
+    if compact:
+        with profiling.stage('preprocess.compact'):
+            df = compact_dtypes(df)
 
-    return df
\ No newline at end of file
+    return df
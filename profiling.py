@@ -0,0 +1,144 @@
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+# Each Streamlit session runs its script on its own thread, so every run
+# records into a recorder of its own
+_state = threading.local()
+
+# tracemalloc is process-wide: it runs while any recorder needs it
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+# Returned by stage() while nothing is recording, so disabled runs only pay
+# for one attribute lookup per stage
+_NOOP = contextlib.nullcontext()
+
+def _recorder():
+    return getattr(_state, 'recorder', None)
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0:
+            tracemalloc.stop()
+
+# Start recording stages on this thread. With cprofile=True a cProfile
+# profile of the same run is collected too (which slows it down).
+def start(cprofile=False):
+    stop()
+    _start_tracing()
+    recorder = {'stages': {}, 'stack': [], 'profile': None, 'started': time.perf_counter()}
+    if cprofile:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            recorder['profile'] = profile
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; another
+            # session is profiling, so this run records stages only
+            pass
+    _state.recorder = recorder
+    return recorder
+
+# Stop recording on this thread and return the recorder (None if none was running)
+def stop():
+    recorder = _recorder()
+    if recorder is None:
+        return None
+    _state.recorder = None
+    if recorder['profile'] is not None:
+        recorder['profile'].disable()
+    recorder['seconds'] = time.perf_counter() - recorder['started']
+    _stop_tracing()
+    return recorder
+
+@contextlib.contextmanager
+def _record(recorder, name):
+    stack = recorder['stack']
+    entry = recorder['stages'].setdefault(name, {'stage': name, 'depth': len(stack), 'calls': 0,
+                                                 'seconds': 0.0, 'peak_mb': 0.0})
+    current, peak = tracemalloc.get_traced_memory()
+    # Hand the peak so far to the enclosing stage before measuring this one
+    if stack:
+        stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+    tracemalloc.reset_peak()
+    frame = {'base': current, 'peak': current}
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        entry['calls'] += 1
+        entry['seconds'] += elapsed
+        entry['peak_mb'] = max(entry['peak_mb'], (peak - frame['base']) / 1024**2)
+
+# Time a stage and its peak memory above what was allocated when it began.
+# Repeated stages (e.g. per batch) add up their time and keep the largest peak.
+def stage(name):
+    recorder = _recorder()
+    if recorder is None:
+        return _NOOP
+    return _record(recorder, name)
+
+def _timed(name, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with stage(name):
+            return function(*args, **kwargs)
+    return wrapper
+
+# Stand-in for a module whose public functions are recorded as stages named
+# "<module>.<function>". While nothing is recording the module itself is
+# returned, so calls go straight to the original functions.
+def instrumented(module):
+    if _recorder() is None:
+        return module
+    return types.SimpleNamespace(**{
+        attr: _timed(f"{module.__name__}.{attr}", value)
+        if isinstance(value, types.FunctionType) and not attr.startswith('_') else value
+        for attr, value in vars(module).items()
+    })
+
+# Recorded stages in the order they were first entered
+def report(recorder):
+    return [dict(entry, seconds=round(entry['seconds'], 4), peak_mb=round(entry['peak_mb'], 2))
+            for entry in recorder['stages'].values()]
+
+# Stages and total run time as JSON
+def to_json(recorder):
+    return json.dumps({'seconds': round(recorder.get('seconds', 0.0), 4), 'stages': report(recorder)}, indent=1)
+
+# The run's cProfile data in the pstats format (load with pstats or snakeviz),
+# or None when it was recorded without cProfile
+def profile_bytes(recorder):
+    if recorder['profile'] is None:
+        return None
+    fd, path = tempfile.mkstemp(suffix='.prof')
+    os.close(fd)
+    try:
+        recorder['profile'].dump_stats(path)
+        with open(path, 'rb') as dump:
+            return dump.read()
+    finally:
+        os.remove(path)
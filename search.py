@@ -0,0 +1,176 @@
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+import helper
+
+# Query syntax: every word must appear (in any order), "quoted words" must
+# appear one after another, and a word ending in * matches every word it begins
+# (as does every bare word in prefix mode, while a quoted word stays exact)
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+# Joins messages for tokenizing them in one pass. Messages are lower-cased, so
+# this upper-case word can never be one of their tokens.
+SEPARATOR = '\nQ\n'
+
+# Inverted index over the messages column: the sorted vocabulary of lower-cased
+# words (the word cloud's tokens), and for each word the ascending row positions
+# of the messages using it, stored back to back as rows[offsets[i]:offsets[i + 1]]
+def build_index(messages):
+    messages = pd.Series(messages)
+    size = len(messages)
+    words = np.array(helper.WORD_PATTERN.findall(SEPARATOR.join(messages.str.lower())), dtype=object)
+    codes, vocabulary = pd.factorize(words)
+
+    # Each word's row is the number of separators before it
+    separator = np.flatnonzero(vocabulary == SEPARATOR.strip())
+    is_separator = codes == (separator[0] if len(separator) else -1)
+    rows = np.cumsum(is_separator)[~is_separator]
+    codes = codes[~is_separator]
+
+    # Renumber words alphabetically, order (word, row) pairs by word with rows
+    # ascending, and keep one pair per message
+    order = np.argsort(vocabulary, kind='stable')
+    order = order[~np.isin(order, separator)]
+    rank = np.empty(len(vocabulary), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    terms = rank[codes]
+    by_term = np.argsort(terms, kind='stable')
+    terms, rows = terms[by_term], rows[by_term]
+    first = np.r_[True, (terms[1:] != terms[:-1]) | (rows[1:] != rows[:-1])] if len(terms) else np.ones(0, dtype=bool)
+
+    return {
+        'size': size,
+        'terms': vocabulary[order].tolist(),
+        'offsets': np.searchsorted(terms[first], np.arange(len(order) + 1)),
+        'rows': rows[first].astype(np.int32 if size < 2**31 else np.int64),
+    }
+
+# Index as flat arrays for np.savez: the vocabulary is stored as one
+# newline-joined UTF-8 buffer (words never contain a newline)
+def to_arrays(index):
+    return {
+        'size': np.array(index['size']),
+        'terms': np.frombuffer('\n'.join(index['terms']).encode('utf-8'), dtype=np.uint8),
+        'offsets': index['offsets'],
+        'rows': index['rows'],
+    }
+
+def from_arrays(arrays):
+    terms = arrays['terms'].tobytes().decode('utf-8')
+    return {
+        'size': int(arrays['size']),
+        'terms': terms.split('\n') if terms else [],
+        'offsets': arrays['offsets'],
+        'rows': arrays['rows'],
+    }
+
+# Rows using a word
+def _postings(index, term):
+    i = bisect_left(index['terms'], term)
+    if i < len(index['terms']) and index['terms'][i] == term:
+        return index['rows'][index['offsets'][i]:index['offsets'][i + 1]]
+    return index['rows'][:0]
+
+# Rows using any word that starts with prefix: those words are one run of the
+# sorted vocabulary, so their postings are one slice
+def _prefix_postings(index, prefix):
+    lo = bisect_left(index['terms'], prefix)
+    hi = bisect_left(index['terms'], prefix + '\U0010ffff')
+    return np.unique(index['rows'][index['offsets'][lo]:index['offsets'][hi]])
+
+# Keep the positions inside a date range and, optionally, one user's rows.
+# Ordered exports use the row index's binary searches; others scan their dates.
+def _restrict(positions, df, row_index, min_date, max_date, user):
+    if min_date is None and user == 'all':
+        return positions
+    if not row_index['sorted']:
+        if min_date is None:
+            kept = np.flatnonzero((df['user'] == user).to_numpy())
+        else:
+            kept = helper.filter_rows(df, row_index, min_date, max_date, user).index.to_numpy()
+        return np.intersect1d(positions, kept, assume_unique=True)
+
+    if min_date is not None:
+        start, stop = helper.row_range(row_index, min_date, max_date)
+        positions = positions[np.searchsorted(positions, start):np.searchsorted(positions, stop)]
+    if user != 'all':
+        positions = np.intersect1d(positions, row_index['users'].get(user, positions[:0]), assume_unique=True)
+    return positions
+
+# Whether the words of phrase appear one after another in tokens
+def _has_phrase(tokens, phrase):
+    return any(tokens[i:i + len(phrase)] == phrase for i in range(len(tokens) - len(phrase) + 1))
+
+# Row positions of the messages matching a query (see QUERY_PATTERN), within a
+# date range and one user when given. Candidates come from intersecting posting
+# lists; only phrases, and terms without any words (emoji, punctuation), are
+# checked against the messages themselves, and only for the candidates left
+# after the user and date restriction.
+def search(index, df, text, row_index=None, min_date=None, max_date=None, user='all', prefix=False):
+    positions = None
+    phrases = []
+    literals = []
+    for phrase, word in QUERY_PATTERN.findall(text):
+        tokens = helper.WORD_PATTERN.findall((phrase or word).lower())
+        if not tokens:
+            # Not in the index: matched as a substring of the message
+            if (phrase or word).strip():
+                literals.append((phrase or word).lower())
+            continue
+        if not phrase and (prefix or word.endswith('*')) and len(tokens) == 1:
+            postings = [_prefix_postings(index, tokens[0])]
+        else:
+            postings = [_postings(index, token) for token in tokens]
+            # A quoted phrase, or one word the tokenizer splits (like "e-mail")
+            if len(tokens) > 1:
+                phrases.append(tokens)
+        for rows in sorted(postings, key=len):
+            positions = rows if positions is None else np.intersect1d(positions, rows, assume_unique=True)
+
+    if positions is None:
+        # An empty query, or one made only of terms without words, starts from
+        # every message; one made only of empty quotes matches nothing
+        positions = np.arange(index['size']) if literals or not text.strip() else np.arange(0)
+    if row_index is not None:
+        positions = _restrict(positions, df, row_index, min_date, max_date, user)
+
+    if literals and len(positions):
+        messages = df['messages'].iloc[positions].astype(str).str.lower()
+        keep = np.ones(len(positions), dtype=bool)
+        for literal in literals:
+            keep &= messages.str.contains(literal, regex=False).to_numpy()
+        positions = positions[keep]
+    if phrases and len(positions):
+        messages = df['messages']
+        keep = [helper.WORD_PATTERN.findall(str(messages.iat[position]).lower()) for position in positions]
+        keep = [all(_has_phrase(tokens, phrase) for phrase in phrases) for tokens in keep]
+        positions = positions[np.array(keep, dtype=bool)]
+    return positions
+
+# Rows of a filtered frame (from helper.filter_rows over df, so labelled by
+# position in df) matching a chat viewer query, as positions into the filtered
+# frame. Bare words match as prefixes, so results follow the query as it is typed.
+def match_rows(index, df, rows, text, row_index, min_date, max_date, user='all'):
+    if not text.strip():
+        return np.arange(len(rows))
+    hits = search(index, df, text, row_index, min_date, max_date, user, prefix=True)
+    return rows.index.get_indexer(hits)
+
+# Index into matches of the first row on or after a day, for the viewer's
+# jump-to-date. Ordered exports are searched through the row index.
+def first_row_on_or_after(rows, row_index, matches, day):
+    labels = rows.index.to_numpy()[matches]
+    if row_index['sorted']:
+        day_position = np.searchsorted(row_index['days'], np.datetime64(day, 'D'), side='left')
+        return int(np.searchsorted(labels, row_index['offsets'][day_position], side='left'))
+
+    days = pd.to_datetime(rows['date'].iloc[matches]).to_numpy().astype('datetime64[D]')
+    later = np.flatnonzero(days >= np.datetime64(day, 'D'))
+    return int(later[0]) if len(later) else len(matches)
+
+# One page of the viewer: only these rows are sent to the browser
+def view_page(rows, matches, page, page_size):
+    return rows.iloc[matches[(page - 1) * page_size:page * page_size]]